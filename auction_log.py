@@ -0,0 +1,19 @@
+import argparse
+from leagues import DEFAULT_LEAGUE, LEAGUES
+from utils import rebuild_from_events, undo_last_events
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Auction event log tools")
+    parser.add_argument("--league", default=DEFAULT_LEAGUE, choices=list(LEAGUES))
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild", help="rebuild players and teams by replaying the event log")
+    undo = commands.add_parser("undo", help="revert the last N sales, undos or status marks")
+    undo.add_argument("count", type=int, nargs="?", default=1)
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        changed = rebuild_from_events(args.league)
+        print(f"State rebuilt from the event log ({changed} players sold or marked).")
+    else:
+        reverted = undo_last_events(args.count, args.league)
+        print(f"Reverted events: {', '.join(map(str, reverted)) or 'none'}")
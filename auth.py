@@ -0,0 +1,53 @@
+import hashlib
+import hmac
+import secrets
+
+from pymongo import UpdateOne
+
+HASH_ALGORITHM = "pbkdf2_sha256"
+HASH_ITERATIONS = 200_000
+
+
+def hash_password(password, salt=None, iterations=HASH_ITERATIONS):
+    salt = salt or secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac("sha256", str(password).encode(), salt.encode(), iterations).hex()
+    return f"{HASH_ALGORITHM}${iterations}${salt}${digest}"
+
+
+def verify_password(password, password_hash):
+    try:
+        algorithm, iterations, salt, _ = password_hash.split("$")
+    except (AttributeError, ValueError):
+        return False
+    if algorithm != HASH_ALGORITHM:
+        return False
+    return hmac.compare_digest(hash_password(password, salt, int(iterations)), password_hash)
+
+
+def find_user_role(db, username, password):
+    # Single indexed lookup on the unique username, fetching only what is checked
+    user = db.users.find_one({"username": username}, {"_id": 0, "password_hash": 1, "role": 1})
+    if user is None or not verify_password(password, user.get("password_hash")):
+        return None
+    return user.get("role")
+
+
+def hash_users_frame(users_df):
+    # CSV rows carry plaintext passwords; only the salted hash is stored
+    users_df = users_df.copy()
+    users_df["password_hash"] = users_df.pop("password").map(hash_password)
+    return users_df
+
+
+def hash_user_passwords(db):
+    # Migrates users stored before passwords were hashed
+    updates = [
+        UpdateOne(
+            {"_id": user["_id"]},
+            {"$set": {"password_hash": hash_password(user["password"])}, "$unset": {"password": ""}},
+        )
+        for user in db.users.find({"password": {"$exists": True}}, {"password": 1})
+    ]
+    if updates:
+        db.users.bulk_write(updates, ordered=False)
+    return len(updates)
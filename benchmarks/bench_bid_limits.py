@@ -0,0 +1,67 @@
+"""Time bid limits for every team as players are sold one at a time.
+
+Checks that the incrementally patched pools give the same limits as pools
+built from scratch. Run from the repository root::
+
+    python -m benchmarks.bench_bid_limits [n_players] [n_teams]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import streamlit_stub
+
+
+def main(n_players=10_000, n_teams=100, sales=500, squad_size=15):
+    streamlit_stub.install()
+    from benchmarks.league import synthetic_players
+    from constraints import BidLimits
+    from scoring import score_players
+
+    rng = np.random.default_rng(0)
+    players_df = synthetic_players(n_players)
+    players_df.insert(0, "player_id", np.arange(1, n_players + 1))
+    players_df["points"] = score_players(players_df)
+    teams = [f"Team {i}" for i in range(n_teams)]
+    players_df["owner"] = pd.Categorical([None] * n_players, categories=teams)
+    teams_df = pd.DataFrame({"team_name": teams, "remaining": 20_000, "roster_count": 0})
+    quotas = {"keeper": 1, "bowler": 3}
+
+    limits = BidLimits(squad_size, quotas)
+    start = time.perf_counter()
+    limits.sync(0, players_df, teams_df)
+    build_seconds = time.perf_counter() - start
+
+    sync_seconds, lookup_seconds = [], []
+    for version in range(1, sales + 1):
+        unsold = np.flatnonzero(players_df["owner"].isna().to_numpy())
+        row = rng.choice(unsold)
+        open_teams = np.flatnonzero(teams_df["roster_count"].to_numpy() < squad_size)
+        team = rng.choice(open_teams)
+        players_df.iloc[row, players_df.columns.get_loc("owner")] = teams[team]
+        teams_df.loc[team, "remaining"] -= players_df["points"].iat[row]
+        teams_df.loc[team, "roster_count"] += 1
+
+        start = time.perf_counter()
+        limits.sync(version, players_df, teams_df)
+        sync_seconds.append(time.perf_counter() - start)
+        player_id = int(players_df["player_id"].iat[rng.choice(unsold[unsold != row])])
+        start = time.perf_counter()
+        limits.limits(player_id)
+        lookup_seconds.append(time.perf_counter() - start)
+
+    fresh = BidLimits(squad_size, quotas)
+    fresh.sync(sales, players_df, teams_df)
+    if limits.limits(player_id) != fresh.limits(player_id):
+        raise AssertionError("Incrementally updated limits differ from a fresh build")
+
+    print(f"players: {n_players}  teams: {n_teams}  squad: {squad_size}  quotas: {quotas}")
+    print(f"build:             {build_seconds * 1000:.2f} ms")
+    print(f"sync after sale:   {np.median(sync_seconds) * 1000:.2f} ms median")
+    print(f"limits, all teams: {np.median(lookup_seconds) * 1000:.2f} ms median")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,94 @@
+"""Count round trips and time the cold start and refresh of the app's data.
+
+mongomock answers in microseconds, so every collection and database call is
+delayed by a simulated network round trip (``--rtt`` milliseconds, default
+30, about what the app sees talking to Atlas) and counted::
+
+    python -m benchmarks.bench_bootstrap [n_players] [--rtt MS]
+"""
+import argparse
+import threading
+import time
+from functools import wraps
+
+from benchmarks import streamlit_stub
+
+COLLECTION_CALLS = [
+    "find", "find_one", "insert_one", "insert_many", "update_one", "update_many", "delete_one", "delete_many",
+    "bulk_write", "find_one_and_update", "find_one_and_delete", "aggregate", "count_documents",
+    "estimated_document_count", "create_index", "create_indexes", "index_information", "rename", "drop",
+]
+DATABASE_CALLS = ["list_collection_names", "create_collection", "command"]
+
+
+class RoundTrips:
+    def __init__(self, rtt):
+        self.rtt = rtt
+        self.count = 0
+        self._lock = threading.Lock()
+        self._depth = threading.local()
+
+    def patch(self, cls, names):
+        # Only the outermost call is a round trip; mongomock implements
+        # find_one with find, create_indexes with create_index and so on.
+        for name in names:
+            method = getattr(cls, name)
+
+            @wraps(method)
+            def delayed(*args, _method=method, **kwargs):
+                depth = getattr(self._depth, "value", 0)
+                if depth == 0:
+                    with self._lock:
+                        self.count += 1
+                    time.sleep(self.rtt)
+                self._depth.value = depth + 1
+                try:
+                    return _method(*args, **kwargs)
+                finally:
+                    self._depth.value = depth
+            setattr(cls, name, delayed)
+
+
+def measure(round_trips, func):
+    before = round_trips.count
+    start = time.perf_counter()
+    func()
+    return round_trips.count - before, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("n_players", type=int, nargs="?", default=1_000)
+    parser.add_argument("--rtt", type=float, default=30.0, help="simulated round trip in milliseconds")
+    args = parser.parse_args()
+
+    streamlit_stub.install()
+    import mongomock
+
+    from benchmarks import standin
+    from benchmarks.league import generate_league
+
+    client = standin.connect()
+    standin.install(client)
+    standin.seed_database(client, generate_league(args.n_players))
+
+    import bootstrap
+    import utils
+
+    round_trips = RoundTrips(args.rtt / 1000)
+    round_trips.patch(mongomock.collection.Collection, COLLECTION_CALLS)
+    round_trips.patch(mongomock.database.Database, DATABASE_CALLS)
+
+    bootstrap.prepare_database.clear()
+    utils.get_state_cache.clear()
+    for label, step in [
+        ("cold start", bootstrap.bootstrap),
+        ("rerun", bootstrap.bootstrap),
+        ("refresh", lambda: bootstrap.bootstrap(refresh=True)),
+    ]:
+        trips, seconds = measure(round_trips, step)
+        print(f"{label:<12} {trips:>4} round trips  {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
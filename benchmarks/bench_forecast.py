@@ -0,0 +1,57 @@
+"""Time a full forecast in this process and on the worker pool.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_forecast [n_players] [n_teams] [--simulations N] [--workers N]
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import streamlit_stub
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("n_players", type=int, nargs="?", default=1_000)
+    parser.add_argument("n_teams", type=int, nargs="?", default=66)
+    parser.add_argument("--simulations", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    streamlit_stub.install()
+    import multiprocessing
+
+    from benchmarks.league import synthetic_players
+    from forecast import WORKERS, forecast
+    from scoring import score_players
+
+    players_df = synthetic_players(args.n_players)
+    players_df.insert(0, "player_id", np.arange(1, args.n_players + 1))
+    players_df["points"] = score_players(players_df)
+    teams = [f"Team {i}" for i in range(args.n_teams)]
+    players_df["owner"] = pd.Categorical([None] * args.n_players, categories=teams)
+    players_df["auction_status"] = "regular"
+    teams_df = pd.DataFrame({"team_name": teams, "spent": 0, "remaining": 20_000, "roster_count": 0})
+
+    start = time.perf_counter()
+    expected = forecast(players_df, teams_df, args.simulations, seed=0)
+    print(f"in process:        {time.perf_counter() - start:.2f} s")
+
+    workers = args.workers or WORKERS
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        # Starting the workers is a one-off cost in the server, so it is not timed
+        list(pool.map(abs, range(workers)))
+        start = time.perf_counter()
+        actual = forecast(players_df, teams_df, args.simulations, seed=0, pool=pool)
+        print(f"{workers} worker process(es): {time.perf_counter() - start:.2f} s")
+    if not expected.equals(actual):
+        raise AssertionError("The pool gave a different forecast for the same seed")
+    print(expected.head())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Transfer size, DataFrame footprint and build latency of player frames.
+
+Compares full documents decoded into a plain DataFrame (the old
+``load_data("players")`` path) with the projected, typed ``state`` view.
+Run from the repository root::
+
+    python -m benchmarks.bench_frames [n_players]
+"""
+import sys
+import time
+
+import bson
+import numpy as np
+import pandas as pd
+
+from benchmarks.league import synthetic_players
+from utils import PLAYER_VIEWS, players_frame, projection
+
+TEAMS = [f"Team {i}" for i in range(1, 41)]
+
+
+def synthetic_documents(n_players, seed=0):
+    rng = np.random.default_rng(seed)
+    players_df = synthetic_players(n_players, seed)
+    players_df.insert(0, "player_id", np.arange(1, n_players + 1))
+    players_df.insert(1, "Name", [f"Player {i}" for i in range(1, n_players + 1)])
+    players_df.insert(2, "Flat No", rng.integers(1001, 4300, n_players))
+    players_df["Age"] = rng.integers(18, 60, n_players).astype(str)
+    players_df["Phone Number"] = rng.integers(7_000_000_000, 9_999_999_999, n_players)
+    players_df["points"] = rng.choice([200, 300, 400, 500], n_players)
+    sold = rng.random(n_players) < 0.3
+    players_df["owner"] = np.where(sold, rng.choice(TEAMS, n_players), None)
+    players_df["auction_price"] = np.where(sold, players_df["points"], 0)
+    players_df["auction_status"] = rng.choice(["prime", "regular", "end"], n_players)
+    documents = players_df.to_dict("records")
+    for document in documents:
+        document["_id"] = bson.ObjectId()
+    return documents
+
+
+def project(document, fields):
+    return {field: document[field] for field in fields if field in document}
+
+
+def main(n_players=50_000):
+    documents = synthetic_documents(n_players)
+    fields = PLAYER_VIEWS["state"]
+    wanted = [field for field in projection(fields) if field != "_id"]
+    projected = [project(document, wanted) for document in documents]
+
+    full_bytes = sum(len(bson.encode(document)) for document in documents)
+    projected_bytes = sum(len(bson.encode(document)) for document in projected)
+
+    start = time.perf_counter()
+    full_df = pd.DataFrame(documents)
+    full_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    typed_df = players_frame(projected, fields, team_names=TEAMS)
+    typed_seconds = time.perf_counter() - start
+
+    full_memory = full_df.memory_usage(deep=True).sum()
+    typed_memory = typed_df.memory_usage(deep=True).sum()
+
+    print(f"players:        {n_players}")
+    print(f"transfer bytes: {full_bytes / 1e6:.1f} MB full -> {projected_bytes / 1e6:.1f} MB projected "
+          f"({full_bytes / projected_bytes:.1f}x smaller)")
+    print(f"frame memory:   {full_memory / 1e6:.1f} MB object -> {typed_memory / 1e6:.1f} MB typed "
+          f"({full_memory / typed_memory:.1f}x smaller)")
+    print(f"build time:     {full_seconds * 1000:.0f} ms object -> {typed_seconds * 1000:.0f} ms typed")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
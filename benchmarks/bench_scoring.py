@@ -0,0 +1,37 @@
+"""Compare the row-wise ``apply`` scoring path with the vectorized engine.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_scoring [n_players]
+"""
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.league import synthetic_players
+from scoring import calculate_points, score_players
+
+
+def main(n_players=100_000):
+    players_df = synthetic_players(n_players)
+
+    start = time.perf_counter()
+    expected = players_df.apply(calculate_points, axis=1).to_numpy()
+    apply_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = score_players(players_df)
+    vectorized_seconds = time.perf_counter() - start
+
+    if not np.array_equal(expected, actual):
+        raise AssertionError("Vectorized scores differ from the row-wise reference")
+
+    print(f"players:    {n_players}")
+    print(f"apply:      {apply_seconds * 1000:.1f} ms")
+    print(f"vectorized: {vectorized_seconds * 1000:.1f} ms")
+    print(f"speedup:    {apply_seconds / vectorized_seconds:.0f}x (identical results)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,69 @@
+"""Load awkward player CSVs through Reset Data on each storage backend.
+
+Covers a header-only file, a file whose only row lacks a required field and
+one repeating a player's Name and Flat No across batches. Every load must
+succeed with the expected number of players and leave no staging
+collections behind. Mongo runs on the in-memory stand-in. Run from the
+repository root::
+
+    python -m benchmarks.check_ingest
+"""
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+from benchmarks import streamlit_stub
+
+HEADER = "Name,Flat No,Skill,Age,Phone Number\n"
+
+
+def write_cases(directory):
+    players = pd.read_csv("data/players.csv")
+    cases = {
+        "header only": (HEADER, 0),
+        "missing name": (HEADER + ",101,Batsman,30,9000000000\n", 0),
+        "repeated keys": (pd.concat([players, players.iloc[[0, 3, 3]]]).to_csv(index=False), len(players)),
+    }
+    paths = {}
+    for name, (text, expected) in cases.items():
+        case_dir = os.path.join(directory, name.replace(" ", "_"))
+        os.makedirs(case_dir)
+        for file_name in ("teams.csv", "users.csv"):
+            shutil.copy(os.path.join("data", file_name), case_dir)
+        with open(os.path.join(case_dir, "players.csv"), "w") as f:
+            f.write(text)
+        paths[name] = (case_dir, expected)
+    return paths
+
+
+def main():
+    streamlit_stub.install()
+    from benchmarks import standin
+
+    client = standin.connect()
+    standin.install(client)
+    client.drop_database("hpl_auction")
+    import ingest
+    from leagues import get_league
+    from storage import MongoStorage, SqliteStorage
+
+    # Small batches so repeats land in different ones
+    ingest.CHUNK_SIZE = 7
+    league = get_league()
+    with tempfile.TemporaryDirectory() as directory:
+        cases = write_cases(directory)
+        MongoStorage().prepare()
+        for name, (case_dir, expected) in cases.items():
+            league.data_dir = case_dir
+            sqlite = SqliteStorage(os.path.join(case_dir, "hpl_auction.db"))
+            counts = {"sqlite": sqlite.reload_from_csv()["players"], "mongo": ingest.reset_database()["players"]}
+            leftovers = [collection for collection in client["hpl_auction"].list_collection_names() if collection.endswith("_staging")]
+            if set(counts.values()) != {expected} or leftovers:
+                raise AssertionError(f"{name}: loaded {counts}, expected {expected} players; staging left: {leftovers}")
+            print(f"{name}: {expected} players loaded on both backends")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Save and restore a snapshot of the CSVs in data/ on each storage backend.
+
+Makes a few sales and marks, snapshots, changes the auction again, restores
+the snapshot and checks players, teams and the draw came back exactly.
+Mongo runs on the in-memory stand-in. Run from the repository root::
+
+    python -m benchmarks.check_snapshots
+"""
+import tempfile
+
+from benchmarks import streamlit_stub
+
+
+def auction_state(storage):
+    state = storage.export_state()
+    return (
+        sorted(((player["player_id"], player["owner"], player["auction_price"], player["auction_status"]) for player in state["players"])),
+        sorted((team["team_name"], team["spent"], team["remaining"], team["roster_count"]) for team in state["teams"]),
+        sorted((entry["player_id"], entry["tier"], entry["rank"]) for entry in state["draw_queue"]),
+        state["draw_current"],
+    )
+
+
+def round_trip(storage, snapshot_dir):
+    import snapshots
+
+    snapshots.SNAPSHOT_DIR = snapshot_dir
+    storage.prepare()
+    _, players_df, teams_df = storage.get_auction_state()
+    player_ids = [int(player_id) for player_id in players_df["player_id"]]
+    teams = list(teams_df["team_name"])
+    for player_id, team in zip(player_ids[:5], teams):
+        storage.commit_sale(player_id, team, 100)
+    storage.mark_players_status(player_ids[5:8], "prime")
+    storage.draw_next_player()
+    expected = auction_state(storage)
+    version = snapshots.save_snapshot(storage)
+
+    storage.undo_auction(player_ids[0])
+    storage.commit_sale(player_ids[9], teams[0], 100)
+    storage.draw_next_player()
+    snapshots.restore_snapshot(storage, version)
+    if auction_state(storage) != expected:
+        raise AssertionError(f"{storage.name}: the restored auction differs from the snapshot of version {version}")
+    print(f"{storage.name}: snapshot of version {version} ({len(player_ids)} players) restored exactly")
+
+
+def main():
+    streamlit_stub.install()
+    from benchmarks import standin
+
+    client = standin.connect()
+    standin.install(client)
+    client.drop_database("hpl_auction")
+    from storage import MongoStorage, SqliteStorage
+
+    with tempfile.TemporaryDirectory() as directory:
+        round_trip(SqliteStorage(f"{directory}/hpl_auction.db"), f"{directory}/sqlite-snapshots")
+        round_trip(MongoStorage(), f"{directory}/mongo-snapshots")
+
+
+if __name__ == "__main__":
+    main()
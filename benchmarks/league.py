@@ -0,0 +1,67 @@
+"""Seeded synthetic leagues that follow the ``data/*.csv`` schema."""
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from scoring import DEFAULT_POINT_TABLES
+
+League = namedtuple("League", ["players", "teams", "users"])
+
+PLAYER_COLUMNS = [
+    "Name", "Flat No", "Age", "Phone Number", "Preferred Playing Position", "Skill",
+    "Batting Skill Level", "Bowler Skill Level", "Bowler Type", "Wicket Keeper",
+]
+
+USER_PASSWORDS = {"admin": "admin123", "auctioneer": "auctioneer123", "owner": "owner123"}
+
+
+def synthetic_players(n_players, seed=0):
+    # Only the scored attributes, drawn uniformly, with missing values mixed in
+    # the way the real CSV leaves bowling fields blank for some players.
+    rng = np.random.default_rng(seed)
+    players = {}
+    for field, table in DEFAULT_POINT_TABLES.items():
+        choices = np.array(list(table) + [None], dtype=object)
+        players[field] = rng.choice(choices, size=n_players)
+    return pd.DataFrame(players)
+
+
+def default_team_count(n_players):
+    # Squads of about 15, between the real league's 4 teams and 100
+    return max(4, min(100, n_players // 15))
+
+
+def generate_league(n_players, n_teams=None, seed=0):
+    rng = np.random.default_rng(seed)
+    n_teams = n_teams or default_team_count(n_players)
+
+    players = synthetic_players(n_players, seed)
+    # Skill is a required column; ingest drops rows without it
+    skills = list(DEFAULT_POINT_TABLES["Skill"])
+    players["Skill"] = players["Skill"].where(players["Skill"].notna(), rng.choice(skills, n_players))
+    # Batsmen usually have no bowling attributes in the real data
+    batsmen = (players["Skill"] == "Batsman").to_numpy() & (rng.random(n_players) < 0.5)
+    players.loc[batsmen, ["Bowler Skill Level", "Bowler Type"]] = None
+    players["Name"] = [f"Player {i:06d}" for i in range(1, n_players + 1)]
+    players["Flat No"] = rng.integers(1001, 5000, n_players)
+    players["Age"] = rng.integers(18, 60, n_players)
+    players["Phone Number"] = rng.integers(7_000_000_000, 9_999_999_999, n_players)
+    players = players[PLAYER_COLUMNS]
+
+    teams = pd.DataFrame({"team_name": [f"Team {i:03d}" for i in range(1, n_teams + 1)]})
+
+    users = [("admin", USER_PASSWORDS["admin"], "admin"), ("auctioneer", USER_PASSWORDS["auctioneer"], "auctioneer")]
+    users += [(f"owner{i}", USER_PASSWORDS["owner"], "owner") for i in range(1, n_teams + 1)]
+    users = pd.DataFrame(users, columns=["username", "password", "role"])
+
+    return League(players, teams, users)
+
+
+def write_csvs(league, directory):
+    paths = {}
+    for name, frame in league._asdict().items():
+        paths[name] = os.path.join(directory, f"{name}.csv")
+        frame.to_csv(paths[name], index=False)
+    return paths
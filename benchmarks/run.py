@@ -0,0 +1,181 @@
+"""Time every utils.py data function and every main.py tab at several league sizes.
+
+Streamlit is replaced by ``benchmarks.streamlit_stub`` and the database by
+mongomock (``pip install -r benchmarks/requirements.txt``), or by a scratch
+mongod given with ``--uri``. Results are written as JSON so runs can be
+compared over time::
+
+    python -m benchmarks.run
+    python -m benchmarks.run --sizes 1000 10000 --uri mongodb://localhost:27017
+"""
+import argparse
+import json
+import os
+import platform
+import runpy
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks import streamlit_stub
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main.py")
+
+# mongomock checks unique indexes document by document, so whole-collection
+# rewrites go quadratic; beyond this size they are only timed on a real mongod.
+STAND_IN_REWRITE_LIMIT = 2_000
+
+
+def timed(func, repeat, setup=None):
+    print(f"  {getattr(func, '__name__', func)}", file=sys.stderr)
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return {"median": statistics.median(samples), "min": min(samples), "runs": repeat}
+
+
+def time_utils(db, league, repeat, ingest_paths=None, rewrites=True):
+    import ingest
+    import utils
+    from leagues import get_league
+
+    unsold = [doc["player_id"] for doc in db.players.find({"owner": None}, {"player_id": 1}).limit(repeat + 30)]
+    team = league.teams["team_name"].iloc[0]
+    batch = unsold[:30]
+    sale_ids = iter(unsold[30:])
+    statuses = iter(["prime", "regular"] * repeat)
+
+    results = {}
+    results["get_auction_state (cold)"] = timed(lambda: utils.AuctionStateCache().snapshot(), repeat)
+    utils.get_auction_state()
+    results["get_auction_state (warm)"] = timed(utils.get_auction_state, repeat)
+    for view in utils.PLAYER_VIEWS:
+        results[f"load_players ({view})"] = timed(lambda: utils.load_players(view), repeat)
+    first_page, next_after = utils.fetch_players_page({"sold": False})
+    results["fetch_players_page (first)"] = timed(lambda: utils.fetch_players_page({"sold": False}), repeat)
+    results["fetch_players_page (next)"] = timed(lambda: utils.fetch_players_page({"sold": False}, next_after), repeat)
+    results["check_collection_empty"] = timed(lambda: utils.check_collection_empty("players"), repeat)
+    results["authenticate"] = timed(lambda: utils.authenticate("admin", "admin123"), repeat)
+    results["mark_players_status (30)"] = timed(lambda: utils.mark_players_status(batch, next(statuses)), repeat)
+
+    sales = []
+    results["commit_sale"] = timed(lambda: sales.append(utils.commit_sale(next(sale_ids), team, 100)), repeat)
+    results["undo_last_events (1)"] = timed(lambda: utils.undo_last_events(1), repeat)
+    sold = [doc["player_id"] for doc in db.players.find({"owner": {"$ne": None}}, {"player_id": 1}).limit(repeat)]
+    sold_ids = iter(sold)
+    results["undo_auction"] = timed(lambda: utils.undo_auction(next(sold_ids)), min(repeat, len(sold)))
+    results["init_db"] = timed(utils.init_db, repeat)
+    results["draw_next_player"] = timed(utils.draw_next_player, repeat)
+    results["get_current_draw"] = timed(utils.get_current_draw, repeat)
+    results["export_state"] = timed(utils.export_state, repeat)
+    if not rewrites:
+        return results
+    state = utils.export_state()
+    results["restore_state"] = timed(lambda: utils.restore_state(state), repeat)
+    results["rebuild_from_events"] = timed(utils.rebuild_from_events, repeat)
+    results["reset_auction_data"] = timed(utils.reset_auction_data, repeat)
+    if ingest_paths:
+        get_league().data_dir = os.path.dirname(ingest_paths["players"])
+        results["ingest"] = timed(ingest.reset_database, 1)
+    return results
+
+
+def rerun(stub, role, view=None):
+    stub.session_state.clear()
+    stub.session_state.update(logged_in=True, role=role, data_loaded=True)
+    if view is not None:
+        stub.session_state["view"] = view
+    stub.reset_measurements()
+    start = time.perf_counter()
+    try:
+        runpy.run_path(MAIN, run_name="__main__")
+    except streamlit_stub.RerunRequested:
+        pass
+    return time.perf_counter() - start, stub.payload_bytes
+
+
+def time_tabs(stub, role, repeat):
+    # One rerun per view and repeat, selected through main.py's navigator
+    rerun(stub, role)
+    results = {}
+    for view in stub.options["view"]:
+        samples, payload = [], 0
+        for _ in range(repeat):
+            seconds, payload = rerun(stub, role, view)
+            samples.append(seconds)
+        results[view] = {"median": statistics.median(samples), "min": min(samples), "runs": repeat, "payload bytes": payload}
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--uri", help="scratch mongod to use instead of mongomock (its hpl_auction database is wiped)")
+    parser.add_argument("--output", help="JSON file to write (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    stub = streamlit_stub.install()
+    from benchmarks import standin
+    from benchmarks.league import generate_league, write_csvs
+
+    client = standin.connect(args.uri)
+    standin.install(client)
+
+    started = datetime.now(timezone.utc)
+    report = {
+        "started": started.isoformat(),
+        "revision": git_revision(),
+        "backend": "mongod" if args.uri else "mongomock",
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "sizes": {},
+    }
+    for n_players in args.sizes:
+        league = generate_league(n_players, seed=args.seed)
+        print(f"{n_players} players, {len(league.teams)} teams", file=sys.stderr)
+        with tempfile.TemporaryDirectory() as directory:
+            rewrites = bool(args.uri) or n_players <= STAND_IN_REWRITE_LIMIT
+            db = standin.seed_database(client, league, seed=args.seed)
+            tabs = {role: time_tabs(stub, role, args.repeat) for role in ("admin", "owner")}
+            standin.seed_database(client, league, seed=args.seed)
+            ingest_paths = write_csvs(league, directory) if rewrites else None
+            report["sizes"][str(n_players)] = {
+                "teams": len(league.teams),
+                "tabs": tabs,
+                "utils": time_utils(db, league, args.repeat, ingest_paths, rewrites),
+            }
+            if not rewrites:
+                report["sizes"][str(n_players)]["skipped"] = {
+                    "functions": ["restore_state", "rebuild_from_events", "reset_auction_data", "ingest"],
+                    "reason": f"mongomock rewrites are quadratic above {STAND_IN_REWRITE_LIMIT} players; pass --uri",
+                }
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"{started:%Y%m%dT%H%M%SZ}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Database for benchmark runs: mongomock by default, or a local mongod.
+
+Either way the ``hpl_auction`` database it points at is wiped and reseeded,
+so never pass the URI of a real auction.
+"""
+import os
+
+import numpy as np
+
+from auth import hash_password
+
+
+class _Admin:
+    def command(self, *args, **kwargs):
+        return {"ok": 1, "ismaster": True}
+
+
+def stand_in_client():
+    import mongomock
+
+    class StandInClient(mongomock.MongoClient):
+        # mongomock has no server commands; answer get_db_connection's ping
+        @property
+        def admin(self):
+            return _Admin()
+
+    return StandInClient()
+
+
+def connect(uri=None):
+    if uri:
+        from pymongo import MongoClient
+        return MongoClient(uri)
+    return stand_in_client()
+
+
+def install(client):
+    # utils.get_db_connection builds its client from MONGODB_URI; hand it ours
+    import utils
+    os.environ.setdefault("MONGODB_URI", "mongodb://stand-in")
+    utils.MongoClient = lambda *args, **kwargs: client
+    utils.get_db_connection.clear()
+
+
+def seed_database(client, league, sold_fraction=0.3, seed=0):
+    # Direct inserts rather than the ingest pipeline: mongomock checks unique
+    # indexes on every insert in O(n), which makes staged loads quadratic.
+    import utils
+    from leagues import get_league
+    from migrations import migrate
+    from scoring import score_players
+
+    rng = np.random.default_rng(seed)
+    db = client["hpl_auction"]
+    client.drop_database("hpl_auction")
+
+    players = league.players.copy()
+    players.insert(0, "player_id", np.arange(1, len(players) + 1))
+    players["points"] = score_players(players)
+    players = players.assign(**utils.PLAYER_BASELINE)
+    teams = list(league.teams["team_name"])
+    sold = rng.random(len(players)) < sold_fraction
+    players.loc[sold, "owner"] = rng.choice(teams, sold.sum())
+    players.loc[sold, "auction_price"] = players.loc[sold, "points"]
+    players["auction_status"] = rng.choice(utils.AUCTION_STATUSES, len(players), p=[0.1, 0.8, 0.1])
+
+    # Budgets sized so every squad can be completed at face value
+    squad_value = int(players["points"].sum() / len(teams) * 1.5)
+    budget = max(get_league().budget, squad_value)
+
+    hashes = {password: hash_password(password) for password in league.users["password"].unique()}
+    users = league.users.assign(password_hash=league.users["password"].map(hashes)).drop(columns="password")
+
+    db.players.insert_many(players.astype(object).where(players.notna(), None).to_dict("records"))
+    db.teams.insert_many([dict(utils.new_team_ledger(budget), team_name=team) for team in teams])
+    db.users.insert_many(users.to_dict("records"))
+    migrate()
+    utils.init_db()
+    utils.rebuild_team_ledger(db)
+    return db
@@ -0,0 +1,175 @@
+"""A stand-in ``streamlit`` module for running ``main.py`` outside a server.
+
+Widgets return their defaults, buttons are never pressed, and caches behave
+like the real decorators (per-argument memoization with ``.clear()``).
+``st.tabs`` hands back blocks that time their own body, keyed widgets expose
+their options so a harness can select each view in turn, and ``st.dataframe``
+converts to Arrow the way the real frontend payload does, so timings include
+serialization.
+"""
+import functools
+import sys
+import time
+import types
+
+import pyarrow as pa
+
+
+class RerunRequested(Exception):
+    pass
+
+
+class SessionState(dict):
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+    def __delattr__(self, name):
+        del self[name]
+
+
+class _Cached:
+    def __init__(self, func):
+        self.func = func
+        self._values = {}
+        functools.update_wrapper(self, func)
+
+    def __call__(self, *args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        try:
+            return self._values[key]
+        except KeyError:
+            value = self._values[key] = self.func(*args, **kwargs)
+            return value
+        except TypeError:
+            # Unhashable arguments are simply not cached
+            return self.func(*args, **kwargs)
+
+    def clear(self):
+        self._values.clear()
+
+
+def _cache(func=None, **options):
+    if func is None:
+        return _Cached
+    return _Cached(func)
+
+
+def _noop(*args, **kwargs):
+    return None
+
+
+class _Block:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return _noop
+
+
+class _TimedBlock(_Block):
+    def __init__(self, timings, label):
+        self._timings = timings
+        self._label = label
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._timings[self._label] = self._timings.get(self._label, 0.0) + time.perf_counter() - self._start
+        return False
+
+
+class StreamlitStub(types.ModuleType):
+    def __init__(self):
+        super().__init__("streamlit")
+        self.session_state = SessionState()
+        self.timings = {}
+        self.options = {}
+        self.payload_bytes = 0
+        self.cache_data = _cache
+        self.cache_resource = _cache
+        self.sidebar = _Block()
+
+        runtime = types.ModuleType("streamlit.runtime")
+        runtime.get_instance = _noop
+        scriptrunner = types.ModuleType("streamlit.runtime.scriptrunner")
+        scriptrunner.get_script_run_ctx = _noop
+        runtime.scriptrunner = scriptrunner
+        self.runtime = runtime
+
+    def reset_measurements(self):
+        self.timings.clear()
+        self.payload_bytes = 0
+
+    def button(self, *args, **kwargs):
+        return False
+
+    form_submit_button = button
+
+    def selectbox(self, label, options, index=0, key=None, **kwargs):
+        # Keyed widgets return the session's value, the way a user's earlier
+        # choice survives reruns
+        options = list(options)
+        if key is not None:
+            self.options[key] = options
+            if self.session_state.get(key) in options:
+                return self.session_state[key]
+        return options[index] if options else None
+
+    radio = selectbox
+
+    def multiselect(self, label, options, default=None, **kwargs):
+        return list(default or [])
+
+    def number_input(self, label, min_value=None, max_value=None, value=None, **kwargs):
+        if value is not None:
+            return value
+        return min_value if min_value is not None else 0
+
+    def text_input(self, label, value="", **kwargs):
+        return value
+
+    def tabs(self, labels):
+        return [_TimedBlock(self.timings, label) for label in labels]
+
+    def form(self, *args, **kwargs):
+        return _Block()
+
+    spinner = form
+
+    def columns(self, spec, **kwargs):
+        return [_Block() for _ in range(spec if isinstance(spec, int) else len(spec))]
+
+    def dataframe(self, data, *args, **kwargs):
+        self.payload_bytes += pa.Table.from_pandas(data).nbytes
+
+    def download_button(self, label, data, *args, **kwargs):
+        self.payload_bytes += len(data)
+
+    def experimental_rerun(self):
+        raise RerunRequested()
+
+    def experimental_get_query_params(self):
+        return {}
+
+    def __getattr__(self, name):
+        # markdown, write, success, image and the other display calls
+        return _noop
+
+
+def install():
+    stub = StreamlitStub()
+    sys.modules["streamlit"] = stub
+    sys.modules["streamlit.runtime"] = stub.runtime
+    sys.modules["streamlit.runtime.scriptrunner"] = stub.runtime.scriptrunner
+    return stub
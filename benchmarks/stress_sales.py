@@ -0,0 +1,143 @@
+"""Hammer ``commit_sale`` from many concurrent consoles and check the invariants.
+
+Run from the repository root. By default this uses an in-memory mongomock
+database and threads. Each thread stands in for a separate app process: the
+in-process write lock is bypassed, and every mongomock call is made atomic
+the way mongod makes each single-document operation atomic, so the
+conditional claim and charge of concurrent sales really interleave. Pass
+``--uri`` to run separate processes against a scratch mongod instead (its
+``hpl_auction`` database is wiped)::
+
+    python -m benchmarks.stress_sales
+    python -m benchmarks.stress_sales --uri mongodb://localhost:27017 --workers 8
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import utils
+
+TEAMS = [f"Team {i}" for i in range(1, 9)]
+
+ATOMIC_CALLS = [
+    "find_one", "find_one_and_update", "insert_one", "insert_many", "update_one", "update_many",
+    "replace_one", "delete_one", "delete_many", "bulk_write",
+]
+
+
+def make_calls_atomic(collection_class):
+    lock = threading.RLock()
+
+    def atomic(method):
+        def call(*args, **kwargs):
+            with lock:
+                return method(*args, **kwargs)
+        return call
+
+    for name in ATOMIC_CALLS:
+        setattr(collection_class, name, atomic(getattr(collection_class, name)))
+
+
+def race_like_processes():
+    # A fresh lock per write: consoles no longer queue behind each other, and
+    # thread switches are forced far more often than the default 5 ms
+    utils.write_lock = lambda database: threading.RLock()
+    sys.setswitchinterval(1e-6)
+
+
+def seed_database(db, n_players, budget):
+    db.players.delete_many({})
+    db.teams.delete_many({})
+    db.players.insert_many([
+        {"player_id": player_id, "Name": f"Player {player_id}", "owner": None, "auction_price": 0}
+        for player_id in range(1, n_players + 1)
+    ])
+    db.teams.insert_many([dict(utils.new_team_ledger(budget), team_name=team) for team in TEAMS])
+
+
+def attempt_sales(worker, attempts, n_players, uri=None):
+    if uri:
+        os.environ["MONGODB_URI"] = uri
+    rng = random.Random(worker)
+    outcomes = []
+    for _ in range(attempts):
+        player_id = rng.randint(1, n_players)
+        team_name = rng.choice(TEAMS)
+        price = rng.randrange(100, 600, 100)
+        outcomes.append((player_id, team_name, price, utils.commit_sale(player_id, team_name, price).value))
+    return outcomes
+
+
+def check_invariants(db, outcomes, budget):
+    failures = []
+    sold = [(player_id, team, price) for player_id, team, price, result in outcomes if result == utils.SaleResult.SOLD.value]
+    for player_id, count in Counter(player_id for player_id, _, _ in sold).items():
+        if count > 1:
+            failures.append(f"player {player_id} reported sold {count} times")
+    owned = {doc["player_id"]: doc for doc in db.players.find({"owner": {"$ne": None}})}
+    if len(owned) != len(sold):
+        failures.append(f"{len(sold)} sales reported but {len(owned)} players owned")
+    for player_id, team, price in sold:
+        doc = owned.get(player_id)
+        if doc is None or doc["owner"] != team or doc["auction_price"] != price:
+            failures.append(f"player {player_id} does not match its reported sale")
+    for team in db.teams.find():
+        roster = [doc for doc in owned.values() if doc["owner"] == team["team_name"]]
+        spent = sum(doc["auction_price"] for doc in roster)
+        if spent > budget or team["remaining"] < 0:
+            failures.append(f"{team['team_name']} overspent: {spent} of {budget}")
+        if (team["spent"], team["remaining"], team["roster_count"]) != (spent, budget - spent, len(roster)):
+            failures.append(f"{team['team_name']} ledger disagrees with its roster")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uri", help="scratch mongod to run worker processes against")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--attempts", type=int, default=200)
+    parser.add_argument("--players", type=int, default=300)
+    parser.add_argument("--budget", type=int, default=3000)
+    args = parser.parse_args()
+
+    if args.uri:
+        from pymongo import MongoClient
+        client = MongoClient(args.uri)
+        pool = ProcessPoolExecutor(args.workers)
+    else:
+        import mongomock
+        make_calls_atomic(mongomock.collection.Collection)
+        client = mongomock.MongoClient()
+        utils.get_db_connection = lambda: client
+        race_like_processes()
+        pool = ThreadPoolExecutor(args.workers)
+    db = client["hpl_auction"]
+    seed_database(db, args.players, args.budget)
+
+    start = time.perf_counter()
+    with pool:
+        futures = [
+            pool.submit(attempt_sales, worker, args.attempts, args.players, args.uri)
+            for worker in range(args.workers)
+        ]
+        outcomes = [outcome for future in futures for outcome in future.result()]
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(outcomes)} sale attempts from {args.workers} workers in {elapsed:.2f}s")
+    for result, count in sorted(Counter(result for *_, result in outcomes).items()):
+        print(f"  {result}: {count}")
+    failures = check_invariants(db, outcomes, args.budget)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print("No double sales and no overspend.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import logging
+import time
+
+import streamlit as st
+
+from leagues import DEFAULT_LEAGUE
+from storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+
+@st.cache_resource
+def prepare_database(league=DEFAULT_LEAGUE):
+    # Migrations, the index check and the initial CSV load run once per
+    # league per process, not on every page load or refresh. A failure is
+    # not cached, so the next session retries.
+    start = time.perf_counter()
+    storage = get_storage(league)
+    storage.prepare()
+    logger.info(f"{storage.name} storage for {league} prepared in {time.perf_counter() - start:.2f}s")
+    return True
+
+
+def bootstrap(refresh=False, league=DEFAULT_LEAGUE):
+    # Everything a session needs before rendering: the prepared database and
+    # one consistent (version, players, teams) snapshot, with players and
+    # teams read concurrently.
+    prepare_database(league)
+    storage = get_storage(league)
+    if refresh:
+        storage.refresh()
+    return storage.get_auction_state()
@@ -0,0 +1,24 @@
+import sys
+from leagues import DEFAULT_LEAGUE
+from migrations import migrate
+from utils import init_db, explain_hot_queries
+
+INDEXED_STAGES = {"IXSCAN", "IDHACK", "EXPRESS_IXSCAN", "EXPRESS_IDHACK", "COUNT_SCAN"}
+
+def check_query_plans(league=DEFAULT_LEAGUE):
+    migrate(league)
+    init_db(league)
+    unindexed = []
+    for label, stages in explain_hot_queries(league).items():
+        # A SORT stage means the page order was not read off the index
+        indexed = any(stage in INDEXED_STAGES for stage in stages) and not {"COLLSCAN", "SORT"} & set(stages)
+        print(f"{'ok  ' if indexed else 'FAIL'} {label}: {' <- '.join(stages)}")
+        if not indexed:
+            unindexed.append(label)
+    return unindexed
+
+if __name__ == "__main__":
+    # python check_indexes.py [league]
+    if check_query_plans(*sys.argv[1:2]):
+        sys.exit(1)
+    print("All hot queries use an index.")
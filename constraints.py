@@ -0,0 +1,190 @@
+import logging
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from leagues import DEFAULT_LEAGUE, LEAGUES, ROLE_QUOTAS, SQUAD_SIZE, get_league
+
+logger = logging.getLogger(__name__)
+
+# Which players fill each role. Squad sizes and role quotas are set per
+# league (see leagues.py).
+ROLES = {
+    "keeper": lambda players_df: players_df["Wicket Keeper"] == "Yes",
+    "bowler": lambda players_df: players_df["Skill"].isin(["Bowler", "All Rounder"]),
+}
+for _config in LEAGUES.values():
+    if set(_config.role_quotas) - set(ROLES):
+        raise ValueError(
+            f"League {_config.name!r} has quotas for unknown roles {sorted(set(_config.role_quotas) - set(ROLES))}; expected {list(ROLES)}"
+        )
+
+BidLimit = namedtuple("BidLimit", ["max_bid", "reserve", "open_slots"])
+
+
+class _PricePool:
+    """Unsold players sorted by (points, player_id).
+
+    Sales and undos remove or insert one entry with a binary search, so the
+    cheapest players are always the head of the arrays.
+    """
+
+    def __init__(self, prices, player_ids):
+        order = np.lexsort((player_ids, prices))
+        self.prices = prices[order]
+        self.player_ids = player_ids[order]
+
+    def _position(self, price, player_id):
+        start = np.searchsorted(self.prices, price, side="left")
+        end = np.searchsorted(self.prices, price, side="right")
+        return start + np.searchsorted(self.player_ids[start:end], player_id)
+
+    def add(self, price, player_id):
+        position = self._position(price, player_id)
+        self.prices = np.insert(self.prices, position, price)
+        self.player_ids = np.insert(self.player_ids, position, player_id)
+
+    def remove(self, price, player_id):
+        position = self._position(price, player_id)
+        if position < len(self.player_ids) and self.player_ids[position] == player_id:
+            self.prices = np.delete(self.prices, position)
+            self.player_ids = np.delete(self.player_ids, position)
+
+    def cheapest(self, count, skip):
+        # Up to count (player_id, price) pairs from the head, passing over skip
+        head = count + len(skip)
+        taken = []
+        for player_id, price in zip(self.player_ids[:head].tolist(), self.prices[:head].tolist()):
+            if len(taken) == count:
+                break
+            if player_id not in skip:
+                taken.append((player_id, price))
+        return taken
+
+
+class BidLimits:
+    """The most each team can bid on a player and still fill its squad.
+
+    A team buying a player must keep enough budget to fill its remaining
+    open slots, each at no less than that player's points. The reserve is
+    the cheapest fill from the unsold pool: first the cheapest players of
+    each role still short of its quota, then the cheapest players overall.
+    When one player fills several roles the fill is still feasible but may
+    not be the cheapest, so limits err on the safe side.
+
+    The pools are kept sorted and patched as players are sold or returned,
+    and a fill only reads the heads of the pools, so a lookup does not
+    depend on how many players are unsold.
+    """
+
+    def __init__(self, squad_size=SQUAD_SIZE, quotas=None):
+        self.squad_size = squad_size
+        self.quotas = dict(ROLE_QUOTAS if quotas is None else quotas)
+        self.version = None
+        self._lock = threading.Lock()
+        self._player_ids = None
+        self._teams = {}
+        self._reserves = {}
+
+    def sync(self, version, players_df, teams_df):
+        with self._lock:
+            if version == self.version:
+                return
+            player_ids = players_df["player_id"].to_numpy(dtype=np.int64)
+            owners = players_df["owner"].astype(object).where(players_df["owner"].notna(), None).to_numpy()
+            points = players_df["points"].to_numpy(dtype=np.int64)
+            if self._player_ids is None or not np.array_equal(self._player_ids, player_ids):
+                self._rebuild(players_df, player_ids, owners, points)
+            else:
+                self._apply_changes(player_ids, owners, points)
+            self._teams = {
+                team["team_name"]: (int(team["remaining"]), int(team["roster_count"]))
+                for team in teams_df[["team_name", "remaining", "roster_count"]].to_dict("records")
+            }
+            self._reserves = {}
+            self.version = version
+
+    def _rebuild(self, players_df, player_ids, owners, points):
+        unsold = pd.isna(owners)
+        self._pools = {None: _PricePool(points[unsold], player_ids[unsold])}
+        self._roles = {}
+        self._team_roles = {}
+        for role in self.quotas:
+            fills = ROLES[role](players_df).to_numpy(dtype=bool)
+            self._pools[role] = _PricePool(points[unsold & fills], player_ids[unsold & fills])
+            for player_id in player_ids[fills].tolist():
+                self._roles.setdefault(player_id, set()).add(role)
+            self._team_roles[role] = pd.Series(owners[fills & ~unsold]).value_counts().to_dict()
+        self._player_ids, self._owners, self._points = player_ids, owners, points
+        logger.info(f"Bid limits built over {unsold.sum()} unsold players")
+
+    def _apply_changes(self, player_ids, owners, points):
+        changed = np.flatnonzero((self._owners != owners) | (self._points != points))
+        for i in changed.tolist():
+            player_id = int(player_ids[i])
+            old_owner, new_owner = self._owners[i], owners[i]
+            roles = self._roles.get(player_id, set())
+            for pool_role in [None] + list(roles):
+                if old_owner is None:
+                    self._pools[pool_role].remove(self._points[i], player_id)
+                if new_owner is None:
+                    self._pools[pool_role].add(points[i], player_id)
+            for role in roles:
+                counts = self._team_roles[role]
+                if old_owner is not None:
+                    counts[old_owner] = counts.get(old_owner, 0) - 1
+                if new_owner is not None:
+                    counts[new_owner] = counts.get(new_owner, 0) + 1
+        self._owners, self._points = owners, points
+
+    def _reserve(self, open_slots, shortfalls, player_id):
+        # Cheapest fill of open_slots leaving out the player being bid on;
+        # memoized per version since teams in the same position share it
+        key = (open_slots, shortfalls, player_id)
+        if key not in self._reserves:
+            chosen = {}
+            for role, short in shortfalls:
+                have = sum(1 for other in chosen if role in self._roles.get(other, ()))
+                wanted = min(short - have, open_slots - len(chosen))
+                if wanted <= 0:
+                    continue
+                for other, price in self._pools[role].cheapest(wanted, chosen.keys() | {player_id}):
+                    chosen[other] = price
+            for other, price in self._pools[None].cheapest(open_slots - len(chosen), chosen.keys() | {player_id}):
+                chosen[other] = price
+            self._reserves[key] = sum(chosen.values())
+        return self._reserves[key]
+
+    def limit(self, team_name, player_id):
+        # None when the team's squad is already full
+        with self._lock:
+            remaining, roster_count = self._teams[team_name]
+            open_slots = self.squad_size - roster_count - 1
+            if open_slots < 0:
+                return None
+            roles = self._roles.get(player_id, set())
+            shortfalls = tuple(
+                (role, short) for role, quota in self.quotas.items()
+                if (short := quota - self._team_roles[role].get(team_name, 0) - (role in roles)) > 0
+            )
+            reserve = self._reserve(open_slots, shortfalls, player_id)
+            return BidLimit(remaining - reserve, reserve, open_slots)
+
+    def limits(self, player_id):
+        return {team_name: self.limit(team_name, player_id) for team_name in list(self._teams)}
+
+
+@st.cache_resource
+def get_bid_limits(league=DEFAULT_LEAGUE):
+    config = get_league(league)
+    return BidLimits(config.squad_size, config.role_quotas)
+
+
+def bid_limits(version, players_df, teams_df, league=DEFAULT_LEAGUE):
+    # Brought up to the given snapshot of the league, reusing the pools of the last one
+    limits = get_bid_limits(league)
+    limits.sync(version, players_df, teams_df)
+    return limits
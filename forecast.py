@@ -0,0 +1,141 @@
+import os
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from leagues import DEFAULT_LEAGUE, get_league
+from utils import draw_tier
+
+logger = logging.getLogger(__name__)
+
+SIMULATIONS = 10_000
+# Simulations per task handed to a worker process
+CHUNK_SIZE = 1_000
+WORKERS = int(os.getenv("HPL_FORECAST_WORKERS", "0")) or os.cpu_count() or 1
+# Sale prices are drawn as points times a lognormal factor with this spread,
+# rounded up to the next 100 like the bids on the Update Auction Status tab
+PRICE_SPREAD = 0.35
+PRICE_STEP = 100
+DRAW_ATTEMPTS = 8
+
+PERCENTILES = [10, 50, 90]
+
+
+def _simulate(seed, simulations, points, tiers, remaining, open_slots):
+    # One block of auctions, all run side by side: every array has a row per
+    # simulation. Players come up tier by tier (prime, regular, end by
+    # default) in a random order within each tier. Each goes to a team chosen uniformly
+    # from those with an open slot that can pay its points while keeping the
+    # cheapest player's points for each other open slot, at a price drawn
+    # around its points and capped at what the winner can pay.
+    rng = np.random.default_rng(seed)
+    n_players, n_teams = len(points), len(remaining)
+    order = np.argsort(tiers + rng.random((simulations, n_players)), axis=1)
+    floor = points.min() if n_players else 0
+    remaining = np.tile(remaining, (simulations, 1))
+    open_slots = np.tile(open_slots, (simulations, 1))
+    limit = np.where(open_slots > 0, remaining - (open_slots - 1) * floor, -1)
+    strength = np.zeros((simulations, n_teams), dtype=np.int64)
+    spent = np.zeros((simulations, n_teams), dtype=np.int64)
+    unfilled = open_slots.sum(axis=1)
+    for step in range(n_players):
+        bidding = np.flatnonzero(unfilled)
+        if not len(bidding):
+            break
+        base = points[order[bidding, step]]
+        winner = np.full(len(bidding), -1)
+        # A few rounds of picking a random team and keeping it if eligible
+        # settle almost every row without touching the whole team matrix
+        undecided = np.arange(len(bidding))
+        for _ in range(DRAW_ATTEMPTS):
+            candidate = rng.integers(n_teams, size=len(undecided))
+            eligible = limit[bidding[undecided], candidate] >= base[undecided]
+            winner[undecided[eligible]] = candidate[eligible]
+            undecided = undecided[~eligible]
+            if not len(undecided):
+                break
+        if len(undecided):
+            # Few teams left able to buy: choose among them directly
+            eligible = limit[bidding[undecided]] >= base[undecided, None]
+            count = eligible.sum(axis=1)
+            pick = (eligible.cumsum(axis=1) <= np.floor(rng.random(len(undecided)) * count)[:, None]).sum(axis=1)
+            winner[undecided[count > 0]] = pick[count > 0]
+        sold = winner >= 0
+        rows, winner, base = bidding[sold], winner[sold], base[sold]
+        asking = np.ceil(base * rng.lognormal(0.0, PRICE_SPREAD, len(rows)) / PRICE_STEP) * PRICE_STEP
+        price = np.maximum(base, np.minimum(asking, limit[rows, winner])).astype(np.int64)
+        remaining[rows, winner] -= price
+        spent[rows, winner] += price
+        strength[rows, winner] += base
+        open_slots[rows, winner] -= 1
+        unfilled[rows] -= 1
+        left = open_slots[rows, winner]
+        limit[rows, winner] = np.where(left > 0, remaining[rows, winner] - (left - 1) * floor, -1)
+    return strength, spent, open_slots
+
+
+def _summarize(name, values, team_names):
+    summary = pd.DataFrame({f"{name} mean": values.mean(axis=0).round().astype(np.int64)}, index=team_names)
+    for percentile, column in zip(PERCENTILES, np.percentile(values, PERCENTILES, axis=0)):
+        summary[f"{name} p{percentile}"] = column.round().astype(np.int64)
+    return summary
+
+
+def forecast(players_df, teams_df, simulations=SIMULATIONS, seed=None, pool=None, league=DEFAULT_LEAGUE):
+    """Per-team distributions of final squad strength and spend.
+
+    Strength is the total points of a team's squad; the league sets the
+    squad size and the tier order. The simulations are split into blocks
+    run on ``pool`` (or in this process without one).
+    """
+    start = time.perf_counter()
+    config = get_league(league)
+    unsold = players_df[players_df["owner"].isna()]
+    points = unsold["points"].to_numpy(dtype=np.int64)
+    tiers = unsold["auction_status"].astype(object).map(lambda status: draw_tier(status, config.statuses)).to_numpy(dtype=np.float64)
+    team_names = list(teams_df["team_name"])
+    remaining = teams_df["remaining"].to_numpy(dtype=np.int64)
+    open_slots = np.maximum(config.squad_size - teams_df["roster_count"].to_numpy(dtype=np.int64), 0)
+    current = (
+        players_df[players_df["owner"].notna()]
+        .groupby(players_df["owner"].astype(object))["points"].sum()
+        .reindex(team_names, fill_value=0).to_numpy(dtype=np.int64)
+    )
+    blocks = [min(CHUNK_SIZE, simulations - first) for first in range(0, simulations, CHUNK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(blocks))
+    args = [(block_seed, block, points, tiers, remaining, open_slots) for block_seed, block in zip(seeds, blocks)]
+    if pool is None:
+        results = [_simulate(*block_args) for block_args in args]
+    else:
+        results = list(pool.map(_simulate, *zip(*args)))
+    strength, spent, unfilled = (np.concatenate(parts) for parts in zip(*results))
+    summary = pd.concat([
+        _summarize("strength", strength + current, team_names),
+        _summarize("spend", spent + teams_df["spent"].to_numpy(dtype=np.int64), team_names),
+    ], axis=1)
+    summary["full squad %"] = ((unfilled == 0).mean(axis=0) * 100).round(1)
+    summary.index.name = "team"
+    logger.info(
+        f"Forecast {simulations} auctions of {len(points)} players for {len(team_names)} teams"
+        f" in {time.perf_counter() - start:.2f}s"
+    )
+    return summary
+
+
+@st.cache_resource
+def get_forecast_pool():
+    # Spawned rather than forked: the server process runs threads (pymongo,
+    # the auction broadcasters) that a fork would copy mid-flight. Shared by
+    # every league.
+    return ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+
+def run_forecast(players_df, teams_df, simulations=SIMULATIONS, league=DEFAULT_LEAGUE):
+    if WORKERS == 1:
+        return forecast(players_df, teams_df, simulations, league=league)
+    return forecast(players_df, teams_df, simulations, pool=get_forecast_pool(), league=league)
@@ -0,0 +1,150 @@
+import os
+import logging
+
+import pandas as pd
+
+from auth import hash_users_frame
+from leagues import DEFAULT_LEAGUE, get_league
+from utils import (
+    PLAYER_BASELINE,
+    build_draw_queue,
+    check_collection_empty,
+    get_db_connection,
+    new_staging_collection,
+    new_team_ledger,
+    record_event,
+    run_concurrently,
+    versioned_write,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rows read, validated, scored and inserted per batch; memory stays bounded
+# by this however large the roster is.
+CHUNK_SIZE = 5000
+
+# CSV files, in each league's data directory
+SOURCE_FILES = {
+    "players": "players.csv",
+    "teams": "teams.csv",
+    "users": "users.csv",
+}
+
+REQUIRED_COLUMNS = {
+    "players": ["Name", "Flat No", "Skill"],
+    "teams": ["team_name"],
+    "users": ["username", "password", "role"],
+}
+
+# Columns under each collection's unique index; a CSV row repeating an
+# earlier row's key is skipped rather than failing the whole load
+UNIQUE_KEYS = {
+    "players": ["Name", "Flat No"],
+    "teams": ["team_name"],
+    "users": ["username"],
+}
+
+
+def sources(league=DEFAULT_LEAGUE):
+    data_dir = get_league(league).data_dir
+    return {name: os.path.join(data_dir, file_name) for name, file_name in SOURCE_FILES.items()}
+
+
+def _prepare_players(chunk, first_id, config):
+    chunk = chunk.dropna(subset=REQUIRED_COLUMNS["players"]).copy()
+    chunk.insert(0, "player_id", range(first_id, first_id + len(chunk)))
+    chunk["points"] = config.point_system.score(chunk)
+    return chunk.assign(**PLAYER_BASELINE)
+
+
+def _prepare_teams(chunk, first_id, config):
+    return chunk.dropna(subset=REQUIRED_COLUMNS["teams"]).assign(**new_team_ledger(config.budget))
+
+
+def _prepare_users(chunk, first_id, config):
+    return hash_users_frame(chunk.dropna(subset=REQUIRED_COLUMNS["users"]))
+
+
+PREPARE = {
+    "players": _prepare_players,
+    "teams": _prepare_teams,
+    "users": _prepare_users,
+}
+
+
+def read_source(collection_name, path, config):
+    # Prepared batches of a CSV, scored and budgeted by the league's config.
+    # Keys are checked across batches as well as within each one.
+    key = UNIQUE_KEYS[collection_name]
+    seen = set()
+    loaded = skipped = 0
+    duplicates = []
+    for chunk in pd.read_csv(path, chunksize=CHUNK_SIZE):
+        missing = [column for column in REQUIRED_COLUMNS[collection_name] if column not in chunk.columns]
+        if missing:
+            raise ValueError(f"{path} is missing required columns: {missing}")
+        complete = chunk.dropna(subset=REQUIRED_COLUMNS[collection_name])
+        skipped += len(chunk) - len(complete)
+        repeated = []
+        for value in complete[key].itertuples(index=False, name=None):
+            repeated.append(value in seen)
+            if value in seen:
+                duplicates.append(value)
+            seen.add(value)
+        # A boolean Series masks rows even when the batch is empty, where a
+        # bare empty list would select columns instead
+        rows = PREPARE[collection_name](complete.loc[~pd.Series(repeated, index=complete.index, dtype=bool)], loaded + 1, config)
+        loaded += len(rows)
+        yield rows
+    if skipped:
+        logger.warning(f"Skipped {skipped} rows of {path} with missing required fields")
+    if duplicates:
+        logger.warning(f"Skipped {len(duplicates)} rows of {path} repeating an earlier {' and '.join(key)}: {duplicates[:10]}")
+
+
+def load_staging(db, collection_name, path, config):
+    # Stream the CSV into <collection>_staging with unordered batch inserts
+    staging = new_staging_collection(db, collection_name)
+    loaded = 0
+    for rows in read_source(collection_name, path, config):
+        if not rows.empty:
+            staging.insert_many(rows.to_dict('records'), ordered=False)
+            loaded += len(rows)
+    return staging, loaded
+
+
+def ingest(collection_names=None, league=DEFAULT_LEAGUE):
+    # Every collection is fully staged before any is swapped in, and each
+    # swap is a single atomic rename, so readers never see a partial or
+    # empty collection.
+    config = get_league(league)
+    client = get_db_connection()
+    db = client[config.database]
+    paths = sources(league)
+    collection_names = list(collection_names or paths)
+    try:
+        staged = {name: load_staging(db, name, paths[name], config) for name in collection_names}
+        with versioned_write(db, reload=True) as version:
+            for name, (staging, loaded) in staged.items():
+                staging.rename(name, dropTarget=True)
+                logger.info(f"Ingested {loaded} {name} from {paths[name]}")
+            if "players" in staged:
+                record_event(db, version, "reset", seed=build_draw_queue(db))
+    except Exception:
+        # Collections already swapped in have no staging left to drop
+        for name in collection_names:
+            db[f"{name}_staging"].drop()
+        raise
+    return {name: loaded for name, (_, loaded) in staged.items()}
+
+
+def load_initial_data(league=DEFAULT_LEAGUE):
+    counts = run_concurrently(*(lambda name=name: check_collection_empty(name, league) for name in SOURCE_FILES))
+    empty = [name for name, is_empty in zip(SOURCE_FILES, counts) if is_empty]
+    if empty:
+        ingest(empty, league)
+    logger.info(f"Initial data for {league} loaded successfully.")
+
+
+def reset_database(league=DEFAULT_LEAGUE):
+    return ingest(league=league)
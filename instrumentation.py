@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+
+import bson
+import pandas as pd
+import streamlit as st
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Off unless HPL_INSTRUMENTATION is set; when off no command listener is
+# registered and traced/span hand back the undecorated function and a
+# shared null context.
+ENABLED = os.getenv("HPL_INSTRUMENTATION", "").lower() in ("1", "true", "yes", "on")
+TRACE_LOG = os.getenv("HPL_TRACE_LOG", "logs/traces.jsonl")
+TRACE_LOG_BYTES = 5 * 1024 * 1024
+TRACE_LOG_BACKUPS = 5
+
+# Reruns kept in memory for the Diagnostics tab
+RECENT_TRACES = 2000
+
+METRICS = ["wall_ms", "round_trips", "documents", "bytes", "mongo_ms"]
+PERCENTILES = [0.5, 0.9, 0.99]
+
+_local = threading.local()
+_recent = deque(maxlen=RECENT_TRACES)
+_recent_lock = threading.Lock()
+_log_lock = threading.Lock()
+_NULL_SPAN = nullcontext()
+
+_trace_log = logging.getLogger("hpl.traces")
+_trace_log.propagate = False
+
+
+def _new_counters():
+    return dict.fromkeys(METRICS, 0)
+
+
+def _current():
+    return getattr(_local, "trace", None)
+
+
+def _reply_documents(reply):
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+    value = reply.get("value")
+    return 1 if isinstance(value, dict) else 0
+
+
+class _CommandTimer(monitoring.CommandListener):
+    # pymongo publishes command events on the thread that issued the command,
+    # which is the session's script thread for everything main.py calls.
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        trace = _current()
+        if trace is not None:
+            trace.command(event.duration_micros / 1000, _reply_documents(event.reply), len(bson.encode(event.reply)))
+
+    def failed(self, event):
+        trace = _current()
+        if trace is not None:
+            trace.command(event.duration_micros / 1000, 0, 0)
+
+
+def event_listeners():
+    return [_CommandTimer()] if ENABLED else []
+
+
+class RerunTrace:
+    def __init__(self, **fields):
+        self.fields = fields
+        self.started = time.perf_counter()
+        self.totals = _new_counters()
+        self.spans = {}
+        self._stack = []
+        self._lock = threading.Lock()
+        self.finished = False
+
+    def command(self, duration_ms, documents, size):
+        # Round trips count against the rerun and the innermost open span.
+        # Commands may arrive from the read pool as well as the script thread.
+        with self._lock:
+            for counters in [self.totals] + self._stack[-1:]:
+                counters["round_trips"] += 1
+                counters["documents"] += documents
+                counters["bytes"] += size
+                counters["mongo_ms"] += duration_ms
+
+    @contextmanager
+    def span(self, name):
+        counters = self.spans.setdefault(name, dict(_new_counters(), calls=0))
+        counters["calls"] += 1
+        self._stack.append(counters)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            counters["wall_ms"] += (time.perf_counter() - start) * 1000
+            self._stack.pop()
+
+    def finish(self):
+        if self.finished:
+            return None
+        self.finished = True
+        self.totals["wall_ms"] = (time.perf_counter() - self.started) * 1000
+        record = dict(
+            self.fields,
+            spans={name: {key: round(value, 3) for key, value in counters.items()} for name, counters in self.spans.items()},
+            **{key: round(value, 3) for key, value in self.totals.items()},
+        )
+        with _recent_lock:
+            _recent.append(record)
+        if _trace_log.handlers:
+            _trace_log.info(json.dumps(record, default=str))
+        return record
+
+
+def _open_trace_log():
+    directory = os.path.dirname(TRACE_LOG)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    handler = RotatingFileHandler(TRACE_LOG, maxBytes=TRACE_LOG_BYTES, backupCount=TRACE_LOG_BACKUPS)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    _trace_log.addHandler(handler)
+    _trace_log.setLevel(logging.INFO)
+    logger.info(f"Writing rerun traces to {TRACE_LOG}")
+
+
+def start_rerun(**fields):
+    # A rerun stopped by st.experimental_rerun never reaches finish_rerun, so
+    # the session's unfinished trace is closed when its next rerun starts.
+    if not ENABLED:
+        return None
+    if not _trace_log.handlers:
+        with _log_lock:
+            if not _trace_log.handlers:
+                _open_trace_log()
+    previous = st.session_state.get("_rerun_trace")
+    if previous is not None:
+        previous.finish()
+    trace = RerunTrace(ts=datetime.now(timezone.utc).isoformat(), **fields)
+    st.session_state["_rerun_trace"] = trace
+    _local.trace = trace
+    return trace
+
+
+def finish_rerun():
+    trace = _current()
+    _local.trace = None
+    if trace is not None:
+        return trace.finish()
+
+
+def span(name):
+    trace = _current()
+    if trace is None:
+        return _NULL_SPAN
+    return trace.span(name)
+
+
+def bind(func):
+    # For work handed to another thread: its commands count against the
+    # rerun that submitted it
+    trace = _current()
+    if trace is None:
+        return func
+
+    @wraps(func)
+    def bound(*args, **kwargs):
+        _local.trace = trace
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.trace = None
+    return bound
+
+
+def traced(func):
+    if not ENABLED:
+        return func
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def recent_traces():
+    with _recent_lock:
+        return list(_recent)
+
+
+def percentiles(traces):
+    # One row per rerun total and per span, with the chosen percentiles of
+    # each metric across the reruns that hit it.
+    rows = []
+    for trace in traces:
+        rows.append(dict({key: trace[key] for key in METRICS}, name="rerun"))
+        for name, counters in trace["spans"].items():
+            rows.append(dict({key: counters[key] for key in METRICS}, name=name))
+    if not rows:
+        return pd.DataFrame()
+    frame = pd.DataFrame(rows)
+    summary = frame.groupby("name")[METRICS].quantile(PERCENTILES).unstack()
+    summary.columns = [f"{metric} p{int(q * 100)}" for metric, q in summary.columns]
+    summary.insert(0, "samples", frame.groupby("name").size())
+    return summary.sort_values(f"wall_ms p{int(PERCENTILES[-1] * 100)}", ascending=False)
@@ -0,0 +1,103 @@
+"""Leagues hosted by this process.
+
+Each league has its own database, team budget, draw tiers, point tables and
+squad rules, and all of them share one pooled MongoDB client. The Horizon
+Premier League ("hpl") is always available; leagues run for other societies
+are described in a JSON file (HPL_LEAGUES_FILE, leagues.json by default)
+keyed by league name, e.g.
+
+    {"greenwood": {"title": "Greenwood Cricket League", "budget": 15000,
+                   "squad_size": 11, "tiers": {"prime": "Prime", "regular": "Regular"}}}
+
+Fields left out take the Horizon Premier League's values, except the
+database (<name>_auction) and the CSV directory (data/<name>). A browser
+picks its league with ?league=<name>; HPL_LEAGUE sets the default.
+"""
+import os
+import json
+
+from scoring import DEFAULT_POINT_TABLES, PointSystem
+
+LEAGUES_FILE = os.getenv("HPL_LEAGUES_FILE", "leagues.json")
+DEFAULT_LEAGUE = os.getenv("HPL_LEAGUE", "hpl")
+
+# Players every team must end the auction with, and optional minimum counts
+# of some roles among them, e.g. HPL_ROLE_QUOTAS="keeper=1,bowler=3"
+SQUAD_SIZE = int(os.getenv("HPL_SQUAD_SIZE", "12"))
+ROLE_QUOTAS = {
+    role: int(count)
+    for role, count in (item.split("=") for item in os.getenv("HPL_ROLE_QUOTAS", "").split(",") if item)
+}
+
+# Draw order and labels; "regular" is where every player starts
+DEFAULT_TIERS = {"prime": "Prime", "regular": "Regular", "end": "End-Auction"}
+
+HPL = {
+    "title": "Horizon Premier League",
+    "database": "hpl_auction",
+    "budget": 20000,
+    "squad_size": SQUAD_SIZE,
+    "role_quotas": ROLE_QUOTAS,
+    "tiers": DEFAULT_TIERS,
+    "point_tables": DEFAULT_POINT_TABLES,
+    "data_dir": "data",
+    "logo": "hpl.jpg",
+}
+
+
+class League:
+    """One league's configuration, with its point tables compiled."""
+
+    def __init__(self, name, title, database, budget, squad_size, role_quotas, tiers, point_tables, data_dir, logo=None):
+        if "regular" not in tiers:
+            raise ValueError(f"League {name!r} has no regular tier; got {list(tiers)}")
+        self.name = name
+        self.title = title
+        self.database = database
+        self.budget = int(budget)
+        self.squad_size = int(squad_size)
+        self.role_quotas = dict(role_quotas)
+        self.tiers = dict(tiers)
+        self.statuses = list(self.tiers)
+        self.point_system = PointSystem(point_tables)
+        # Fixed vocabularies decode straight into categoricals
+        self.categories = dict(
+            {field: list(table) for field, table in self.point_system.tables.items()},
+            auction_status=self.statuses,
+        )
+        self.data_dir = data_dir
+        self.logo = logo
+
+
+def load_leagues(path=LEAGUES_FILE):
+    configs = {"hpl": {}}
+    if os.path.exists(path):
+        with open(path) as f:
+            configs.update(json.load(f))
+    leagues = {}
+    for name, config in configs.items():
+        defaults = HPL if name == "hpl" else dict(HPL, database=f"{name}_auction", data_dir=os.path.join("data", name), logo=None)
+        leagues[name] = League(name, **dict(defaults, **config))
+    databases = [league.database for league in leagues.values()]
+    if len(set(databases)) != len(databases):
+        raise ValueError(f"Leagues in {path} must each have their own database; got {databases}")
+    return leagues
+
+
+LEAGUES = load_leagues()
+if DEFAULT_LEAGUE not in LEAGUES:
+    raise ValueError(f"HPL_LEAGUE names unknown league {DEFAULT_LEAGUE!r}; expected one of {list(LEAGUES)}")
+
+_BY_DATABASE = {league.database: league for league in LEAGUES.values()}
+
+
+def get_league(name=DEFAULT_LEAGUE):
+    try:
+        return LEAGUES[name]
+    except KeyError:
+        raise ValueError(f"Unknown league {name!r}; expected one of {list(LEAGUES)}") from None
+
+
+def league_of(db):
+    # Helpers handed a database rather than a league name
+    return _BY_DATABASE[db.name]
@@ -0,0 +1,115 @@
+import logging
+import threading
+import time
+
+import streamlit as st
+from pymongo.errors import PyMongoError
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from leagues import DEFAULT_LEAGUE
+from storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+# Fallback for storage without change streams (standalone mongod, mongomock,
+# local SQLite) and for a change stream that fails.
+# One poller per league per process, however many browsers are connected.
+POLL_INTERVAL = 0.25
+
+# What each auction event can change on screen
+EVENT_TOPICS = {
+    "sale": {"sales"},
+    "undo": {"sales"},
+    "status": {"status"},
+    "draw": {"draw"},
+    "revert": {"sales", "status"},
+    "reset": {"sales", "status", "draw"},
+}
+
+
+class AuctionBroadcaster:
+    """Watches one league's event log and pushes reruns to affected sessions.
+
+    Sessions subscribe with the topics their visible tabs depend on; when an
+    event arrives, only sessions whose topics it touches are asked to rerun.
+    """
+
+    def __init__(self, storage):
+        self._storage = storage
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._last_seq = storage.last_event_seq()
+        self._last_draw = storage.last_draw_seq()
+        threading.Thread(target=self._run, name=f"auction-broadcaster-{storage.league}", daemon=True).start()
+
+    def subscribe(self, topics):
+        ctx = get_script_run_ctx()
+        if ctx is None:
+            return
+        with self._lock:
+            if topics:
+                self._subscribers[ctx.session_id] = set(topics)
+            else:
+                self._subscribers.pop(ctx.session_id, None)
+
+    def _run(self):
+        events = self._storage.watch_events()
+        if events is None:
+            logger.info(f"No change stream for {self._storage.name} storage; polling the event log every {POLL_INTERVAL}s")
+        else:
+            try:
+                self._watch(events)
+            except PyMongoError as e:
+                logger.warning(f"Change stream failed ({e!r}); polling the event log every {POLL_INTERVAL}s")
+        while True:
+            try:
+                self._poll()
+            except Exception as e:
+                logger.error(f"Auction event polling failed: {e}")
+            time.sleep(POLL_INTERVAL)
+
+    def _watch(self, events):
+        for event in events:
+            if event["type"] == "draw":
+                self._last_draw = max(self._last_draw, event["seq"])
+            else:
+                self._last_seq = max(self._last_seq, event["seq"])
+            self._publish([event])
+
+    def _poll(self):
+        # Draws are counted apart from the data version, so two cursors
+        events = self._storage.events_since(self._last_seq)
+        draws = self._storage.draws_since(self._last_draw)
+        if events:
+            self._last_seq = max(event["seq"] for event in events)
+        if draws:
+            self._last_draw = max(draw["seq"] for draw in draws)
+        if events or draws:
+            self._publish(events + draws)
+
+    def _publish(self, events):
+        topics = set().union(*(EVENT_TOPICS.get(event["type"], set()) for event in events))
+        with self._lock:
+            sessions = [session_id for session_id, wanted in self._subscribers.items() if wanted & topics]
+        for session_id in sessions:
+            self._request_rerun(session_id)
+
+    def _request_rerun(self, session_id):
+        info = runtime.get_instance()._session_mgr.get_active_session_info(session_id)
+        if info is None:
+            # Browser went away
+            with self._lock:
+                self._subscribers.pop(session_id, None)
+            return
+        # AppSession expects to be driven from the server's event loop
+        info.session._event_loop.call_soon_threadsafe(info.session.request_rerun, None)
+
+
+@st.cache_resource
+def get_broadcaster(league=DEFAULT_LEAGUE):
+    return AuctionBroadcaster(get_storage(league))
+
+
+def subscribe_session(topics, league=DEFAULT_LEAGUE):
+    get_broadcaster(league).subscribe(topics)
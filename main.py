@@ -2,21 +2,24 @@ import streamlit as st
 import pandas as pd
 import random
 import logging
-from utils import (
-    init_db,
-    load_data,
-    save_data,
-    update_auction_status,
-    fetch_auctioned_players,
-    fetch_unauctioned_players,
-    check_collection_empty,
-    calculate_points,
-    load_initial_data,
-    mark_player_status,
-    get_players_by_status,
-    undo_auction,
+from utils import PAGE_SIZE, SaleResult
+from leagues import DEFAULT_LEAGUE, LEAGUES
+from storage import get_storage
+from constraints import bid_limits
+from forecast import SIMULATIONS, run_forecast
+from snapshots import snapshot_after_sale
+from live import subscribe_session
+from instrumentation import (
+    ENABLED as INSTRUMENTATION_ENABLED,
+    METRICS,
+    TRACE_LOG,
+    finish_rerun,
+    percentiles,
+    recent_traces,
+    span,
+    start_rerun,
 )
-import subprocess
+from bootstrap import bootstrap
 
 # Set page config at the very beginning
 st.set_page_config(layout="wide")
@@ -30,19 +33,37 @@ if "role" not in st.session_state:
     st.session_state.role = None
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
-if "team_budgets" not in st.session_state:
-    st.session_state.team_budgets = {}
 if "data_loaded" not in st.session_state:
     st.session_state.data_loaded = False
-if "random_player" not in st.session_state:
-    st.session_state.random_player = None
+if "data_version" not in st.session_state:
+    st.session_state.data_version = None
+
+# One process serves every league; a browser picks its own with ?league=<name>.
+# Reruns pushed by live.py carry no query string, so without one the session
+# stays in the league it already has.
+league = st.experimental_get_query_params().get("league", [st.session_state.get("league", DEFAULT_LEAGUE)])[0]
+if league not in LEAGUES:
+    st.error(f"Unknown league {league!r}.")
+    st.stop()
+config = LEAGUES[league]
+if st.session_state.get("league") not in (None, league):
+    # Each league has its own users and data
+    subscribe_session(set(), st.session_state.league)
+    st.session_state.role = None
+    st.session_state.logged_in = False
+    st.session_state.data_loaded = False
+    st.session_state.data_version = None
+st.session_state.league = league
 
-def init_and_load_data():
+# Mongo or local SQLite, per HPL_STORAGE
+storage = get_storage(league)
+
+# Per-rerun Mongo round trips and tab timings, when HPL_INSTRUMENTATION is set
+start_rerun(role=st.session_state.role, league=league)
+
+def init_and_load_data(refresh=False):
     try:
-        init_db()
-        load_initial_data()
-        teams_df = load_data("teams")
-        st.session_state.team_budgets = {team: 20000 for team in teams_df["team_name"].unique()}
+        bootstrap(refresh, league)
         logger.info("Data initialized and loaded successfully")
         st.session_state.data_loaded = True
     except Exception as e:
@@ -50,46 +71,95 @@ def init_and_load_data():
         st.error(f"An error occurred while initializing the application: {e}")
 
 def reset_database():
-    subprocess.run(["python", "reset_db.py"])
+    storage.reload_from_csv()
     st.session_state.data_loaded = False
     st.experimental_rerun()
 
 def load_all_data():
-    players_df = load_data("players")
-    teams_df = load_data("teams")
-    for col, default in [("owner", None), ("auction_price", 0), ("auction_status", "regular")]:
-        if col not in players_df.columns:
-            players_df[col] = default
-    if "points" not in players_df.columns:
-        players_df["points"] = players_df.apply(calculate_points, axis=1)
+    # Shared, versioned snapshot: a rerun only re-reads documents written since
+    # the last version any session saw.
+    version, players_df, teams_df = storage.get_auction_state()
+    st.session_state.data_version = version
     return players_df, teams_df
 
+def derived_view(name, build):
+    # Built at most once per data version, whichever session asks first
+    return storage.get_derived_view(st.session_state.data_version, name, build)
+
+# Auction event topics (see live.EVENT_TOPICS) each tab depends on
+TAB_TOPICS = {
+    "update_auction_status_tab": {"sales", "status", "draw"},
+    "mark_players_tab": {"status"},
+    "teams_tab": {"sales"},
+    "unauctioned_players_tab": {"sales", "status"},
+    "auctioned_players_tab": {"sales"},
+    "undo_auction_tab": {"sales"},
+    "point_system_tab": set(),
+    "players_list_tab": {"sales", "status"},
+    # Not rerun on every sale; the forecast is simulated for the version
+    # the view was opened at
+    "forecast_tab": set(),
+    "diagnostics_tab": set(),
+}
+
+ROSTER_COLUMNS = ["Name", "Flat No", "Skill", "Preferred Playing Position", "Batting Skill Level", 
+                  "Bowler Skill Level", "Bowler Type", "Wicket Keeper", "points", "auction_price"]
+PLAYERS_LIST_COLUMNS = ROSTER_COLUMNS[:-1] + ["owner", "auction_price"]
+
 def display_player_details(player_details):
     for field in ["Name", "Flat No", "Skill", "Preferred Playing Position", "Batting Skill Level", 
                   "Bowler Skill Level", "Bowler Type", "Wicket Keeper", "points"]:
         st.write(f"{field}: {player_details[field]}")
 
-def display_team_players(team, players_df):
-    st.write(f"**{team}**")
-    team_players = players_df[players_df["owner"] == team].copy()
-    columns_to_display = ["Name", "Flat No", "Skill", "Preferred Playing Position", "Batting Skill Level", 
-                          "Bowler Skill Level", "Bowler Type", "Wicket Keeper", "points", "auction_price"]
-    team_players = team_players[columns_to_display]
-    team_players.index = range(1, len(team_players) + 1)
-    st.dataframe(team_players)
+ALL = "All"
+UNSOLD = "Unsold"
+
+def choose_filter(label, options, key):
+    # "All" leaves the filter off
+    choice = st.selectbox(label, [ALL] + list(options), key=key)
+    return None if choice == ALL else choice
+
+def paged_players(key, filters, columns, view="state"):
+    # Keyset pagination: the session keeps the cursor each visited page
+    # starts after, and only the current page is fetched and rendered.
+    # Changing a filter goes back to the first page.
+    if st.session_state.get(f"{key}_filters") != filters:
+        st.session_state[f"{key}_filters"] = filters
+        st.session_state[f"{key}_cursors"] = [None]
+    cursors = st.session_state[f"{key}_cursors"]
+    after = cursors[-1]
+    page, next_after = derived_view(
+        f"{key}:{sorted(filters.items())}:{after}",
+        lambda: storage.page_players(filters, after, view=view),
+    )
+    first_row = (len(cursors) - 1) * PAGE_SIZE + 1
+    table = page[columns]
+    table.index = range(first_row, first_row + len(table))
+    st.dataframe(table)
+    previous_col, page_col, next_col = st.columns([1, 2, 1])
+    page_col.write(f"Page {len(cursors)}")
+    if previous_col.button("Previous", key=f"{key}_previous", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.experimental_rerun()
+    if next_col.button("Next", key=f"{key}_next", disabled=next_after is None):
+        cursors.append(next_after)
+        st.experimental_rerun()
 
 # Sidebar and main content setup
 with st.sidebar:
-    st.image("hpl.jpg", width=200)
+    if config.logo:
+        st.image(config.logo, width=200)
     if not st.session_state.logged_in:
         st.subheader("Login")
-        users_df = load_data("users")
-        username = st.text_input("Username")
-        password = st.text_input("Password", type="password")
-        if st.button("Login"):
-            user = users_df[(users_df["username"] == username) & (users_df["password"] == password)]
-            if not user.empty:
-                st.session_state.role = user.iloc[0]["role"]
+        # A form only reruns the script on submit, not on every keystroke
+        with st.form("login"):
+            username = st.text_input("Username")
+            password = st.text_input("Password", type="password")
+            submitted = st.form_submit_button("Login")
+        if submitted:
+            role = storage.authenticate(username, password)
+            if role is not None:
+                st.session_state.role = role
                 st.session_state.logged_in = True
                 st.success(f"Logged in as {st.session_state.role}")
                 st.experimental_rerun()
@@ -104,10 +174,10 @@ with st.sidebar:
     if st.button("Reset Data"):
         reset_database()
 
-st.markdown("<h1 style='text-align: center; color: #4CAF50;'>Horizon Premier League Auction System</h1>", unsafe_allow_html=True)
+st.markdown(f"<h1 style='text-align: center; color: #4CAF50;'>{config.title} Auction System</h1>", unsafe_allow_html=True)
 
 if st.button("Refresh Data"):
-    st.session_state.data_loaded = False
+    init_and_load_data(refresh=True)
     st.experimental_rerun()
 
 if not st.session_state.data_loaded:
@@ -116,100 +186,115 @@ if not st.session_state.data_loaded:
 if st.session_state.logged_in:
     players_df, teams_df = load_all_data()
 
-    tabs = st.tabs(["Update Auction Status", "Mark Players", "Teams", "Unauctioned Players", "Auctioned Players", "Undo Auction", "Point System", "Players List"] 
-                   if st.session_state.role in ["auctioneer", "admin"] else 
-                   ["Teams", "Unauctioned Players", "Auctioned Players", "Point System", "Players List"])
-
     def update_auction_status_tab():
         st.markdown("<h2 style='color: #FF5733;'>Update Auction Status</h2>", unsafe_allow_html=True)
         st.subheader("Random Player Selection")
-        unauctioned_players = players_df[players_df["owner"].isnull()]
-        for status in ["prime", "regular", "end"]:
-            player_pool = unauctioned_players[unauctioned_players["auction_status"] == status]
-            if not player_pool.empty:
-                break
+        # The draw order is held server-side, so every console sees the same
+        # player on the block and a browser reload does not lose it
         if st.button("Pick Random Player for Auction"):
-            if not player_pool.empty:
-                st.session_state.random_player = player_pool.sample(n=1).iloc[0]
-                st.success(f"Random player picked for auction: {st.session_state.random_player['Name']} (Flat No: {st.session_state.random_player['Flat No']}, Status: {st.session_state.random_player['auction_status']})")
-            else:
+            if storage.draw_next_player() is None:
                 st.warning("No more players available for auction.")
-                st.session_state.random_player = None
+        drawn_player_id = storage.get_current_draw()
+        drawn_player = players_df[players_df["player_id"] == drawn_player_id]
+        if not drawn_player.empty:
+            drawn_player = drawn_player.iloc[0]
+            st.success(f"Random player picked for auction: {drawn_player['Name']} (Flat No: {drawn_player['Flat No']}, Status: {drawn_player['auction_status']})")
         st.markdown("<hr>", unsafe_allow_html=True)
-        if st.session_state.random_player is not None:
-            selected_player = st.session_state.random_player["Name"]
+        if not drawn_player.empty:
+            selected_player_id = drawn_player_id
         else:
-            player_type = st.selectbox("Select Player Type", ["Batsman", "Bowler", "All Rounder"])
-            available_players = players_df[(players_df["owner"].isnull()) & (players_df["Skill"] == player_type)][["Name", "Flat No"]]
+            player_type = st.selectbox("Select Player Type", config.categories["Skill"])
+            available_players = players_df[(players_df["owner"].isnull()) & (players_df["Skill"] == player_type)]
             if available_players.empty:
                 st.write(f"No {player_type} players available for auction.")
                 return
-            player_options = [f"{row['Name']} (Flat No: {row['Flat No']})" for _, row in available_players.iterrows()]
-            selected_player_with_flat = st.selectbox("Select Player", player_options)
-            selected_player = selected_player_with_flat.split(" (Flat No:")[0]
-        player_details = players_df.loc[players_df["Name"] == selected_player].iloc[0]
+            player_labels = {row["player_id"]: f"{row['Name']} (Flat No: {row['Flat No']})" for _, row in available_players.iterrows()}
+            selected_player_id = st.selectbox("Select Player", list(player_labels), format_func=player_labels.get)
+        player_details = players_df.loc[players_df["player_id"] == selected_player_id].iloc[0]
+        selected_player = player_details["Name"]
         display_player_details(player_details)
         selected_team = st.selectbox("Select Team", teams_df["team_name"])
         player_price = int(player_details["points"])
-        if selected_team not in st.session_state.team_budgets:
-            st.session_state.team_budgets[selected_team] = 20000
-        remaining_budget = int(st.session_state.team_budgets[selected_team] - players_df[players_df["owner"] == selected_team]["auction_price"].sum())
-        auction_price = st.number_input("Auction Price", min_value=player_price, max_value=remaining_budget, step=100)
+        # Not the whole remaining budget: enough must stay back to fill the
+        # rest of the squad at the cheapest unsold players' points
+        limit = bid_limits(st.session_state.data_version, players_df, teams_df, league).limit(selected_team, int(selected_player_id))
+        if limit is None:
+            st.warning(f"{selected_team} already has a full squad of {config.squad_size} players.")
+            return
+        if limit.max_bid < player_price:
+            st.warning(f"{selected_team} can bid at most {limit.max_bid} points while keeping {limit.reserve} for its {limit.open_slots} other open slots.")
+            return
+        st.caption(f"Maximum bid {limit.max_bid} points, keeping {limit.reserve} for {limit.open_slots} other open slots.")
+        auction_price = st.number_input("Auction Price", min_value=player_price, max_value=limit.max_bid, step=100)
         if st.button("Update Auction Status"):
-            update_auction_status(selected_player, selected_team, auction_price)
+            result = storage.commit_sale(selected_player_id, selected_team, auction_price)
+            if result is SaleResult.ALREADY_SOLD:
+                st.error(f"{selected_player} (Flat No: {player_details['Flat No']}) has already been sold")
+                return
+            if result is SaleResult.INSUFFICIENT_BUDGET:
+                st.error(f"{selected_team} cannot afford {auction_price} points")
+                return
+            snapshot_after_sale(storage)
             st.success(f"Auction status updated: {selected_player} (Flat No: {player_details['Flat No']}) bought by {selected_team} for {auction_price} points")
-            st.session_state.data_loaded = False
-            st.session_state.random_player = None
+            # The shared snapshot picks the sale up on the rerun; no re-bootstrap
             st.experimental_rerun()
 
     def mark_players_tab():
         st.markdown("<h2 style='color: #FF5733;'>Mark Players</h2>", unsafe_allow_html=True)
-        for status in ["Prime", "End-Auction"]:
-            st.subheader(f"Mark {status} Players")
-            players = st.multiselect(f"Select {status} Players", players_df[players_df["auction_status"] != status.lower()]["Name"].tolist())
-            if st.button(f"Mark as {status}"):
-                for player in players:
-                    mark_player_status(player, status.lower())
-                st.success(f"Players marked as {status.lower()} successfully!")
+        for status, label in config.tiers.items():
+            if status == "regular":
+                continue
+            st.subheader(f"Mark {label} Players")
+            candidates = players_df[players_df["auction_status"] != status]
+            player_labels = dict(zip(candidates["player_id"], candidates["Name"]))
+            players = st.multiselect(f"Select {label} Players", list(player_labels), format_func=player_labels.get)
+            if st.button(f"Mark as {label}"):
+                result = storage.mark_players_status(players, status)
+                st.success(f"Players marked as {status} successfully! ({result.modified} of {result.matched} changed)")
 
     def teams_tab():
         st.markdown("<h2 style='color: #FF5733;'>Teams and their Players</h2>", unsafe_allow_html=True)
-        team_expenses = players_df.groupby("owner")["auction_price"].sum().reset_index()
-        team_expenses.columns = ["team", "expenses"]
-        team_expenses["expenses"] = team_expenses["expenses"].fillna(0)
-        team_expenses["remaining"] = team_expenses["team"].map(st.session_state.team_budgets) - team_expenses["expenses"]
+        # Ledger fields are maintained on each sale and undo, no need to sum the player table
+        team_expenses = teams_df[["team_name", "spent", "remaining", "roster_count"]].copy()
+        team_expenses.columns = ["team", "expenses", "remaining", "players"]
         team_expenses.index = range(1, len(team_expenses) + 1)
-        st.dataframe(team_expenses[["team", "expenses", "remaining"]])
-        for team in teams_df["team_name"].unique():
-            display_team_players(team, players_df)
+        st.dataframe(team_expenses)
+        team = st.selectbox("Team", teams_df["team_name"], key="roster_team")
+        if team is not None:
+            st.write(f"**{team}**")
+            paged_players("team_roster", {"owner": team}, ROSTER_COLUMNS, view="auctioned")
 
     def unauctioned_players_tab():
         st.markdown("<h2 style='color: #FF5733;'>Unauctioned Players</h2>", unsafe_allow_html=True)
-        unauctioned_players = players_df[players_df["owner"].isnull()].copy()
+        skill_col, status_col = st.columns(2)
+        with skill_col:
+            skill = choose_filter("Skill", config.categories["Skill"], "unauctioned_skill")
+        with status_col:
+            status = choose_filter("Status", config.statuses, "unauctioned_status")
         columns_to_display = ["Name", "Flat No", "Skill", "Preferred Playing Position", "Batting Skill Level", 
                               "Bowler Skill Level", "Bowler Type", "Wicket Keeper", "points", "auction_status"]
-        unauctioned_players = unauctioned_players[columns_to_display]
-        unauctioned_players.index = range(1, len(unauctioned_players) + 1)
-        st.dataframe(unauctioned_players)
+        paged_players("unauctioned", {"sold": False, "skill": skill, "status": status}, columns_to_display, view="unauctioned")
 
     def auctioned_players_tab():
         st.markdown("<h2 style='color: #FF5733;'>Auctioned Players</h2>", unsafe_allow_html=True)
-        auctioned_players = players_df[players_df["owner"].notnull()].copy()
+        skill_col, owner_col = st.columns(2)
+        with skill_col:
+            skill = choose_filter("Skill", config.categories["Skill"], "auctioned_skill")
+        with owner_col:
+            owner = choose_filter("Team", teams_df["team_name"], "auctioned_owner")
         columns_to_display = ["Name", "Flat No", "Skill", "Preferred Playing Position", "Batting Skill Level", 
                               "Bowler Skill Level", "Bowler Type", "Wicket Keeper", "points", "owner", "auction_price"]
-        auctioned_players = auctioned_players[columns_to_display]
-        auctioned_players.index = range(1, len(auctioned_players) + 1)
-        st.dataframe(auctioned_players)
+        paged_players("auctioned", {"sold": True, "skill": skill, "owner": owner}, columns_to_display, view="auctioned")
 
     def undo_auction_tab():
         st.markdown("<h2 style='color: #FF5733;'>Undo Auction</h2>", unsafe_allow_html=True)
         auctioned_players = players_df[players_df["owner"].notnull()]
         if not auctioned_players.empty:
-            player_options = [f"{row['Name']} (Team: {row['owner']}, Price: {row['auction_price']})" for _, row in auctioned_players.iterrows()]
-            selected_player = st.selectbox("Select Player to Undo Auction", player_options)
+            player_labels = {row["player_id"]: f"{row['Name']} (Team: {row['owner']}, Price: {row['auction_price']})" for _, row in auctioned_players.iterrows()}
+            selected_player_id = st.selectbox("Select Player to Undo Auction", list(player_labels), format_func=player_labels.get)
             if st.button("Undo Auction"):
-                player_name = selected_player.split(" (Team:")[0]
-                if undo_auction(player_name):
+                player_name = auctioned_players.loc[auctioned_players["player_id"] == selected_player_id, "Name"].iloc[0]
+                if storage.undo_auction(selected_player_id):
                     st.success(f"Auction undone for player: {player_name}")
                     st.experimental_rerun()
                 else:
@@ -217,41 +302,32 @@ if st.session_state.logged_in:
         else:
             st.warning("No auctioned players available.")
 
+        st.subheader("Undo Last Actions")
+        count = st.number_input("Number of sales, undos or status marks to revert", min_value=1, value=1, step=1)
+        if st.button("Undo Last Actions"):
+            reverted = storage.undo_last_events(count)
+            if reverted:
+                st.success(f"Reverted {len(reverted)} action(s)")
+                st.experimental_rerun()
+            else:
+                st.warning("Nothing left to revert since the last reset.")
+
     def point_system_tab():
         st.markdown("<h2 style='color: #FF5733;'>Point System</h2>", unsafe_allow_html=True)
+        # Rendered from the same tables the scoring engine compiles, so the
+        # published scheme cannot drift from the points players are given.
+        notes = {
+            "Bowler Skill Level": " (only for Bowlers and All rounders)",
+            "Bowler Type": " (only for Bowlers and All Runders)",
+        }
+        sections = []
+        for number, (field, table) in enumerate(config.point_system.tables.items(), start=1):
+            items = "\n".join(f"           - {value}: {points} points" for value, points in table.items())
+            sections.append(f"        {number}. **{field}{notes.get(field, '')}:**\n{items}")
         st.markdown("""
         Our auction system uses the following point allocation:
 
-        1. **Preferred Playing Position:**
-           - Opener: 100 points
-           - Middle Order: 75 points
-           - Finisher: 100 points
-
-        2. **Skill:**
-           - Batsman: 100 points
-           - Bowler: 100 points
-           - All Rounder: 150 points
-
-        3. **Batting Skill Level:**
-           - Beginner: 25 points
-           - Intermediate: 50 points
-           - Advanced: 75 points
-           - Expert: 100 points
-
-        4. **Bowler Skill Level (only for Bowlers and All rounders):**
-           - Beginner: 25 points
-           - Intermediate: 50 points
-           - Advanced: 75 points
-           - Expert: 100 points
-
-        5. **Bowler Type (only for Bowlers and All Runders):**
-           - Fast: 75 points
-           - Medium: 50 points
-           - Spin: 75 points
-
-        6. **Wicket Keeper:**
-           - Yes: 50 points
-           - No: 0 points
+""" + "\n\n".join(sections) + """
 
         Players are awarded points based on their attributes in each category. The total points for a player is the sum of points from all applicable categories.
 
@@ -263,15 +339,30 @@ if st.session_state.logged_in:
           * 375 points become 400
         """)
 
-    def players_list_tab():
-        st.markdown("<h2 style='color: #FF5733;'>Players List</h2>", unsafe_allow_html=True)
-        columns_to_display = ["Name", "Flat No", "Skill", "Preferred Playing Position", "Batting Skill Level", 
-                              "Bowler Skill Level", "Bowler Type", "Wicket Keeper", "points", "owner", "auction_price"]
-        players_list = players_df[columns_to_display].copy()
+    def players_list_table():
+        players_list = players_df[PLAYERS_LIST_COLUMNS].copy()
         players_list = players_list.sort_values("points", ascending=False)
         players_list.index = range(1, len(players_list) + 1)
-        st.dataframe(players_list)
-        csv = players_list.to_csv(index=False)
+        return players_list
+
+    def players_list_tab():
+        st.markdown("<h2 style='color: #FF5733;'>Players List</h2>", unsafe_allow_html=True)
+        skill_col, status_col, owner_col = st.columns(3)
+        with skill_col:
+            skill = choose_filter("Skill", config.categories["Skill"], "players_list_skill")
+        with status_col:
+            status = choose_filter("Status", config.statuses, "players_list_status")
+        with owner_col:
+            owner = choose_filter("Team", [UNSOLD] + list(teams_df["team_name"]), "players_list_owner")
+        filters = {"skill": skill, "status": status}
+        if owner == UNSOLD:
+            filters["sold"] = False
+        else:
+            filters["owner"] = owner
+        paged_players("players_list", filters, PLAYERS_LIST_COLUMNS)
+        # The export is the whole list; download_button needs the bytes at
+        # render time, so it is built once per version and shared by sessions
+        csv = derived_view("players_list_csv", lambda: players_list_table().to_csv(index=False))
         st.download_button(
             label="Download Players List",
             data=csv,
@@ -279,30 +370,71 @@ if st.session_state.logged_in:
             mime="text/csv",
         )
 
-    # Display tabs based on user role
+    def forecast_tab():
+        st.markdown("<h2 style='color: #FF5733;'>Auction Forecast</h2>", unsafe_allow_html=True)
+        st.write(f"The rest of the auction played out {SIMULATIONS:,} times from the current state: players come up "
+                 f"tier by tier ({', '.join(config.tiers.values())}), sell for around their points, and go to teams "
+                 f"that can still fill a squad of {config.squad_size}. Strength is the total points of a team's final squad.")
+        # Several seconds of simulation, run once per data version
+        with st.spinner("Simulating the rest of the auction..."):
+            summary = derived_view("forecast", lambda: run_forecast(players_df, teams_df, league=league))
+        st.dataframe(summary)
+        st.bar_chart(summary[["strength p10", "strength p50", "strength p90"]])
+
+    def diagnostics_tab():
+        st.markdown("<h2 style='color: #FF5733;'>Diagnostics</h2>", unsafe_allow_html=True)
+        if not INSTRUMENTATION_ENABLED:
+            st.info("Instrumentation is off. Start the app with HPL_INSTRUMENTATION=1 to record per-rerun timings.")
+            return
+        traces = recent_traces()
+        if not traces:
+            st.info("No reruns recorded yet.")
+            return
+        st.write(f"Percentiles over the last {len(traces)} reruns served by this process. "
+                 f"Times are in milliseconds and sizes in bytes; every trace is also written to {TRACE_LOG}.")
+        st.dataframe(percentiles(traces))
+        st.subheader("Slowest Recent Reruns")
+        slowest = pd.DataFrame(traces)[["ts", "role"] + METRICS].nlargest(20, "wall_ms")
+        slowest.index = range(1, len(slowest) + 1)
+        st.dataframe(slowest)
+
+    # Views available to each role
     if st.session_state.role in ["auctioneer", "admin"]:
-        tab_functions = [
-            update_auction_status_tab,
-            mark_players_tab,
-            teams_tab,
-            unauctioned_players_tab,
-            auctioned_players_tab,
-            undo_auction_tab,
-            point_system_tab,
-            players_list_tab
-        ]
+        views = {
+            "Update Auction Status": update_auction_status_tab,
+            "Mark Players": mark_players_tab,
+            "Teams": teams_tab,
+            "Unauctioned Players": unauctioned_players_tab,
+            "Auctioned Players": auctioned_players_tab,
+            "Undo Auction": undo_auction_tab,
+            "Point System": point_system_tab,
+            "Players List": players_list_tab,
+            "Forecast": forecast_tab,
+        }
+        if st.session_state.role == "admin":
+            views["Diagnostics"] = diagnostics_tab
     else:
-        tab_functions = [
-            teams_tab,
-            unauctioned_players_tab,
-            auctioned_players_tab,
-            point_system_tab,
-            players_list_tab
-        ]
-
-    for tab, tab_function in zip(tabs, tab_functions):
-        with tab:
-            tab_function()
+        views = {
+            "Teams": teams_tab,
+            "Unauctioned Players": unauctioned_players_tab,
+            "Auctioned Players": auctioned_players_tab,
+            "Point System": point_system_tab,
+            "Players List": players_list_tab,
+            "Forecast": forecast_tab,
+        }
+
+    # Unlike st.tabs, which runs every tab body on each rerun, only the
+    # selected view is computed
+    selected_view = st.radio("View", list(views), horizontal=True, key="view", label_visibility="collapsed")
+    view_function = views[selected_view]
+
+    # Live updates: rerun this session only for events that touch what it shows
+    subscribe_session(TAB_TOPICS[view_function.__name__], league)
+
+    with span(view_function.__name__):
+        view_function()
 
 else:
-    st.warning("Please log in to access the auction system.")
\ No newline at end of file
+    st.warning("Please log in to access the auction system.")
+
+finish_rerun()
\ No newline at end of file
@@ -0,0 +1,99 @@
+import logging
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from auth import hash_user_passwords
+from leagues import DEFAULT_LEAGUE, get_league, league_of
+from utils import (
+    assign_player_ids,
+    build_draw_queue,
+    get_db_connection,
+    rebuild_team_ledger,
+    start_event_log,
+    versioned_write,
+    write_fields,
+)
+
+logger = logging.getLogger(__name__)
+
+# Each step is a server-side update filtered to the documents that still need
+# it, so a step interrupted midway (or run twice by two processes starting
+# together) simply finishes the job on the next run.
+
+
+def _backfill_auction_fields(db):
+    db.players.update_many({"owner": {"$exists": False}}, {"$set": {"owner": None}})
+    db.players.update_many({"auction_price": None}, {"$set": {"auction_price": 0}})
+    db.players.update_many({"auction_status": None}, {"$set": {"auction_status": "regular"}})
+
+
+def _rename_end_status(db):
+    # "End-Auction" marks used to be stored under a status the tiers never matched
+    db.players.update_many({"auction_status": "end-auction"}, {"$set": {"auction_status": "end"}})
+
+
+def _score_unscored_players(db):
+    point_system = league_of(db).point_system
+    docs = list(db.players.find({"points": None}, dict.fromkeys(point_system.tables, 1)))
+    if docs:
+        players_df = pd.DataFrame(docs, columns=["_id"] + list(point_system.tables))
+        points = point_system.score(players_df)
+        write_fields(db, "players", [({"_id": _id}, {"points": int(value)}) for _id, value in zip(players_df["_id"], points)])
+
+
+def _backfill_team_ledgers(db):
+    if db.teams.find_one({"remaining": {"$exists": False}}, {"_id": 1}):
+        rebuild_team_ledger(db)
+
+
+def _start_event_log(db):
+    if db.auction_events.find_one({}, {"_id": 1}) is None:
+        start_event_log(db)
+
+
+def _build_draw_queue(db):
+    if db.meta.find_one({"_id": "draw"}, {"_id": 1}) is None:
+        build_draw_queue(db)
+
+
+# Ordered and never renumbered; append new steps at the end
+MIGRATIONS = [
+    (1, "backfill auction fields", _backfill_auction_fields),
+    (2, "assign player ids", assign_player_ids),
+    (3, "rename end-auction status", _rename_end_status),
+    (4, "score unscored players", _score_unscored_players),
+    (5, "backfill team ledgers", _backfill_team_ledgers),
+    (6, "hash plaintext passwords", hash_user_passwords),
+    (7, "start event log", _start_event_log),
+    (8, "build draw queue", _build_draw_queue),
+]
+
+
+def schema_version(db):
+    return (db.meta.find_one({"_id": "schema"}, {"version": 1}) or {}).get("version", 0)
+
+
+def migrate(league=DEFAULT_LEAGUE):
+    # Up to date is a single lookup of the schema version. Each league's
+    # database carries its own.
+    client = get_db_connection()
+    db = client[get_league(league).database]
+    current = schema_version(db)
+    pending = [migration for migration in MIGRATIONS if migration[0] > current]
+    if not pending:
+        return []
+    # Migrated documents are not versioned individually, so cached snapshots
+    # in every process are rebuilt from scratch
+    with versioned_write(db, reload=True):
+        for version, name, step in pending:
+            logger.info(f"Applying migration {version}: {name}")
+            step(db)
+            # Recorded only once the step has finished
+            db.meta.update_one(
+                {"_id": "schema"},
+                {"$max": {"version": version}, "$set": {f"applied.{version}": datetime.now(timezone.utc)}},
+                upsert=True,
+            )
+    logger.info(f"Schema of {db.name} migrated from version {current} to {pending[-1][0]}")
+    return [(version, name) for version, name, _ in pending]
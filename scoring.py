@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+# Point tables as published on the "Point System" tab. Leagues with a
+# different scheme compile their own tables with PointSystem(tables).
+DEFAULT_POINT_TABLES = {
+    "Preferred Playing Position": {"Opener": 100, "Middle Order": 75, "Finisher": 100},
+    "Skill": {"Batsman": 100, "Bowler": 100, "All Rounder": 150},
+    "Batting Skill Level": {"Beginner": 25, "Intermediate": 50, "Advanced": 75, "Expert": 100},
+    "Bowler Skill Level": {"Beginner": 25, "Intermediate": 50, "Advanced": 75, "Expert": 100},
+    "Bowler Type": {"Fast": 75, "Medium": 50, "Spin": 75},
+    "Wicket Keeper": {"Yes": 50, "No": 0},
+}
+
+
+class PointSystem:
+    """Point tables compiled into categorical lookup arrays.
+
+    Each field maps to the table's categories and an array of their points
+    with a trailing 0, so the categorical code -1 (missing or unknown value)
+    scores nothing, exactly like ``dict.get(value, 0)``.
+    """
+
+    def __init__(self, tables):
+        self.tables = {field: dict(table) for field, table in tables.items()}
+        self._lookups = {
+            field: (pd.Index(list(table)), np.array(list(table.values()) + [0], dtype=np.int64))
+            for field, table in self.tables.items()
+        }
+
+    def score_row(self, row):
+        points = sum(table.get(row.get(field), 0) for field, table in self.tables.items())
+
+        # Round to nearest 100
+        return int(round(points / 100.0) * 100)
+
+    def score(self, players_df):
+        points = np.zeros(len(players_df), dtype=np.int64)
+        for field, (categories, values) in self._lookups.items():
+            if field in players_df.columns:
+                codes = pd.Categorical(players_df[field], categories=categories).codes
+                points += values[codes]
+
+        # Round to nearest 100 (half to even, like the built-in round)
+        return (np.round(points / 100.0) * 100).astype(np.int64)
+
+
+DEFAULT_POINT_SYSTEM = PointSystem(DEFAULT_POINT_TABLES)
+
+
+def calculate_points(row, point_system=DEFAULT_POINT_SYSTEM):
+    return point_system.score_row(row)
+
+
+def score_players(players_df, point_system=DEFAULT_POINT_SYSTEM):
+    return point_system.score(players_df)
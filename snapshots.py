@@ -0,0 +1,154 @@
+"""Point-in-time snapshots of the auction, saved as compressed Parquet.
+
+    python snapshots.py [--league NAME] save                # snapshot the current version
+    python snapshots.py [--league NAME] list
+    python snapshots.py [--league NAME] restore [VERSION]   # the latest snapshot by default
+
+Each snapshot is a directory named after the data version it was taken at,
+under a directory per league, holding players, teams and the draw queue; the
+draw seed and position ride along in the file metadata. The app also takes one in the background every
+HPL_SNAPSHOT_EVERY sales (0 turns that off).
+"""
+import os
+import sys
+import json
+import shutil
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from leagues import DEFAULT_LEAGUE, LEAGUES
+from storage import get_storage
+from utils import SNAPSHOT_COLLECTIONS
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.getenv("HPL_SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_EVERY = int(os.getenv("HPL_SNAPSHOT_EVERY", "10"))
+COMPRESSION = "zstd"
+METADATA_KEY = b"hpl_snapshot"
+
+# Columns stored as integers; every other column is stored as text. Contact
+# fields copied from the CSV are free text (an Age of "Young" next to numeric
+# ones), so they are never left to Arrow's type inference.
+INTEGER_COLUMNS = {"player_id", "Flat No", "points", "auction_price", "budget", "spent", "remaining", "roster_count", "tier", "rank"}
+
+# Automatic snapshots are written off the rerun that made the sale, one at a time
+_snapshot_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hpl-snapshot")
+
+
+def snapshot_dir(league=DEFAULT_LEAGUE):
+    return os.path.join(SNAPSHOT_DIR, league)
+
+
+def snapshot_path(version, league=DEFAULT_LEAGUE):
+    return os.path.join(snapshot_dir(league), f"v{version:08d}")
+
+
+def list_snapshots(league=DEFAULT_LEAGUE):
+    directory = snapshot_dir(league)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(int(name[1:]) for name in os.listdir(directory) if name.startswith("v") and name[1:].isdigit())
+
+
+def _to_table(rows):
+    frame = pd.DataFrame(rows)
+    columns = {}
+    for column in frame.columns:
+        if column in INTEGER_COLUMNS:
+            columns[column] = pa.Array.from_pandas(frame[column].astype("Int64"))
+        else:
+            values = frame[column].astype(object).where(frame[column].notna(), None)
+            columns[column] = pa.array([None if value is None else str(value) for value in values], type=pa.string())
+    return pa.table(columns)
+
+
+def save_snapshot(storage):
+    state = storage.export_state()
+    path = snapshot_path(state["version"], storage.league)
+    if os.path.isdir(path):
+        return state["version"]
+    metadata = {
+        "version": state["version"],
+        "draw_seed": state["draw_seed"],
+        "draw_current": state["draw_current"],
+        "taken_at": datetime.now(timezone.utc).isoformat(),
+    }
+    # Written beside the final directory and renamed into place, so a crash
+    # mid-write never leaves a snapshot that looks complete
+    staging = f"{path}.partial"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    for name in SNAPSHOT_COLLECTIONS:
+        table = _to_table(state[name])
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), METADATA_KEY: json.dumps(metadata)})
+        pq.write_table(table, os.path.join(staging, f"{name}.parquet"), compression=COMPRESSION)
+    os.replace(staging, path)
+    logger.info(f"Saved snapshot of {storage.league} version {state['version']} ({len(state['players'])} players) to {path}")
+    return state["version"]
+
+
+def load_snapshot(version, league=DEFAULT_LEAGUE):
+    path = snapshot_path(version, league)
+    tables = {name: pq.read_table(os.path.join(path, f"{name}.parquet")) for name in SNAPSHOT_COLLECTIONS}
+    state = json.loads(tables["players"].schema.metadata[METADATA_KEY])
+    state.update((name, table.to_pylist()) for name, table in tables.items())
+    return state
+
+
+def restore_snapshot(storage, version=None):
+    # Returns the data version the restore was written as
+    versions = list_snapshots(storage.league)
+    if version is None:
+        if not versions:
+            raise ValueError(f"No snapshots in {snapshot_dir(storage.league)}")
+        version = versions[-1]
+    elif version not in versions:
+        raise ValueError(f"No snapshot of version {version} in {snapshot_dir(storage.league)}")
+    state = load_snapshot(version, storage.league)
+    return storage.restore_state(state, source="snapshot", snapshot_version=version)
+
+
+def _snapshot_if_due(storage):
+    try:
+        versions = list_snapshots(storage.league)
+        since = versions[-1] if versions else 0
+        sales = sum(1 for event in storage.events_since(since) if event["type"] == "sale")
+        if sales >= SNAPSHOT_EVERY:
+            save_snapshot(storage)
+    except Exception as e:
+        logger.error(f"Automatic snapshot of {storage.league} failed: {e}")
+
+
+def snapshot_after_sale(storage):
+    if SNAPSHOT_EVERY > 0:
+        _snapshot_pool.submit(_snapshot_if_due, storage)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Save, list and restore auction snapshots")
+    parser.add_argument("--league", default=DEFAULT_LEAGUE, choices=list(LEAGUES))
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("save")
+    commands.add_parser("list")
+    restore = commands.add_parser("restore")
+    restore.add_argument("version", type=int, nargs="?")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for version in list_snapshots(args.league):
+            print(version)
+        sys.exit(0)
+    storage = get_storage(args.league)
+    storage.prepare()
+    if args.command == "save":
+        print(f"Saved snapshot of version {save_snapshot(storage)} in {snapshot_dir(args.league)}.")
+    else:
+        print(f"Restored snapshot; the auction is now at version {restore_snapshot(storage, args.version)}.")
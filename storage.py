@@ -0,0 +1,857 @@
+import os
+import json
+import sqlite3
+import logging
+import secrets
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+import streamlit as st
+
+import utils
+from auth import hash_users_frame, verify_password
+from ingest import SOURCE_FILES, load_initial_data, read_source, reset_database, sources
+from leagues import DEFAULT_LEAGUE, get_league
+from migrations import migrate
+from utils import (
+    PLAYER_BASELINE,
+    PLAYER_VIEWS,
+    PAGE_SIZE,
+    REVERSIBLE_EVENTS,
+    TEAM_FIELDS,
+    AuctionStateCache,
+    BulkResult,
+    SaleResult,
+    _baseline_changes,
+    _ledger_change,
+    _player_change,
+    _team_deltas,
+    draw_rank,
+    draw_tier,
+    new_team_ledger,
+    player_filter,
+    players_frame,
+)
+
+logger = logging.getLogger(__name__)
+
+# "mongo" (the default) or "sqlite". SQLite keeps a whole auction on the
+# auctioneer's machine; sync.py pushes it to Mongo when the network allows.
+STORAGE_BACKEND = os.getenv("HPL_STORAGE", "mongo").lower()
+# One file per league, named after its database
+SQLITE_DIR = os.getenv("HPL_SQLITE_DIR", ".")
+
+
+def sqlite_path(league=DEFAULT_LEAGUE):
+    return os.path.join(SQLITE_DIR, f"{get_league(league).database}.db")
+
+
+class Storage(ABC):
+    """Everything main.py, bootstrap.py and live.py read or write for one league.
+
+    Backends keep the same data model as the Mongo collections: players by
+    player_id, team ledgers by team_name, hashed users, a versioned state,
+    an append-only event log whose seq is the version that wrote it, and a
+    draw log with its own seq, since draws leave the data version alone.
+    """
+
+    name = None
+    league = DEFAULT_LEAGUE
+
+    @abstractmethod
+    def prepare(self):
+        ...
+
+    @abstractmethod
+    def refresh(self):
+        ...
+
+    @abstractmethod
+    def get_auction_state(self):
+        ...
+
+    @abstractmethod
+    def get_derived_view(self, version, name, build):
+        ...
+
+    @abstractmethod
+    def page_players(self, filters, after=None, limit=PAGE_SIZE, view="state"):
+        # (page, next cursor); see utils.fetch_players_page
+        ...
+
+    @abstractmethod
+    def commit_sale(self, player_id, team_name, auction_price):
+        ...
+
+    @abstractmethod
+    def undo_auction(self, player_id):
+        ...
+
+    @abstractmethod
+    def mark_players_status(self, player_ids, status):
+        ...
+
+    @abstractmethod
+    def undo_last_events(self, count=1):
+        ...
+
+    @abstractmethod
+    def reset_auction_data(self):
+        ...
+
+    @abstractmethod
+    def reload_from_csv(self):
+        ...
+
+    @abstractmethod
+    def authenticate(self, username, password):
+        ...
+
+    @abstractmethod
+    def draw_next_player(self):
+        ...
+
+    @abstractmethod
+    def get_current_draw(self):
+        ...
+
+    @abstractmethod
+    def export_state(self):
+        # {"version", "players", "teams", "draw_queue", "draw_seed",
+        # "draw_current"} as of one data version
+        ...
+
+    @abstractmethod
+    def restore_state(self, state, **fields):
+        # Replaces players, teams and the draw with an exported state in one
+        # versioned write, logged as a reset event carrying fields
+        ...
+
+    @abstractmethod
+    def load_data(self, collection_name):
+        ...
+
+    @abstractmethod
+    def save_data(self, collection_name, data):
+        ...
+
+    @abstractmethod
+    def check_collection_empty(self, collection_name):
+        ...
+
+    @abstractmethod
+    def last_event_seq(self):
+        ...
+
+    @abstractmethod
+    def events_since(self, seq):
+        ...
+
+    @abstractmethod
+    def last_draw_seq(self):
+        ...
+
+    @abstractmethod
+    def draws_since(self, seq):
+        # Draws are logged apart from the event log, with their own seq
+        ...
+
+    def watch_events(self):
+        # An iterator over new entries of both logs, or None when the backend
+        # has no push feed and must be polled
+        return None
+
+
+class MongoStorage(Storage):
+    name = "mongo"
+
+    def __init__(self, league=DEFAULT_LEAGUE):
+        self.league = league
+
+    def prepare(self):
+        migrate(self.league)
+        utils.init_db(self.league)
+        load_initial_data(self.league)
+
+    def refresh(self):
+        utils.get_state_cache(self.league).reset()
+
+    def get_auction_state(self):
+        return utils.get_auction_state(self.league)
+
+    def get_derived_view(self, version, name, build):
+        return utils.get_derived_view(version, name, build, self.league)
+
+    def page_players(self, filters, after=None, limit=PAGE_SIZE, view="state"):
+        return utils.fetch_players_page(filters, after, limit, view, self.league)
+
+    def commit_sale(self, player_id, team_name, auction_price):
+        return utils.update_auction_status(player_id, team_name, auction_price, self.league)
+
+    def undo_auction(self, player_id):
+        return utils.undo_auction(player_id, self.league)
+
+    def mark_players_status(self, player_ids, status):
+        return utils.mark_players_status(player_ids, status, self.league)
+
+    def undo_last_events(self, count=1):
+        return utils.undo_last_events(count, self.league)
+
+    def reset_auction_data(self):
+        return utils.reset_auction_data(self.league)
+
+    def reload_from_csv(self):
+        return reset_database(self.league)
+
+    def authenticate(self, username, password):
+        return utils.authenticate(username, password, self.league)
+
+    def draw_next_player(self):
+        return utils.draw_next_player(self.league)
+
+    def get_current_draw(self):
+        return utils.get_current_draw(self.league)
+
+    def export_state(self):
+        return utils.export_state(self.league)
+
+    def restore_state(self, state, **fields):
+        return utils.restore_state(state, self.league, **fields)
+
+    def load_data(self, collection_name):
+        return utils.load_data(collection_name, self.league)
+
+    def save_data(self, collection_name, data):
+        return utils.save_data(collection_name, data, self.league)
+
+    def check_collection_empty(self, collection_name):
+        return utils.check_collection_empty(collection_name, self.league)
+
+    def _db(self):
+        return utils.get_db_connection()[get_league(self.league).database]
+
+    def _events(self):
+        return self._db().auction_events
+
+    def last_event_seq(self):
+        last = self._events().find_one({}, {"seq": 1}, sort=[("seq", -1)])
+        return last["seq"] if last else 0
+
+    def events_since(self, seq):
+        # Only up to the published version: an event of a write still in
+        # flight elsewhere may yet land below newer ones
+        state = self._db().meta.find_one({"_id": "state"}) or {}
+        return self._events_through(seq, utils.published_version(state)[0])
+
+    def _events_through(self, seq, published):
+        if published <= seq:
+            return []
+        return list(self._events().find({"seq": {"$gt": seq, "$lte": published}}, {"seq": 1, "type": 1}))
+
+    def last_draw_seq(self):
+        last = self._db().draw_events.find_one({}, {"seq": 1}, sort=[("seq", -1)])
+        return last["seq"] if last else 0
+
+    def draws_since(self, seq):
+        return list(self._db().draw_events.find({"seq": {"$gt": seq}}, {"seq": 1, "type": 1}))
+
+    def watch_events(self):
+        # Change streams need the replica set or sharded cluster that
+        # transactions do; standalone servers and stand-ins are polled
+        if not utils._supports_transactions(utils.get_db_connection()):
+            return None
+        return self._watch()
+
+    def _watch(self):
+        # An event's insert lands before its writer publishes the version, so
+        # the feed follows the state document rather than event inserts and
+        # releases events only once their version is published, as
+        # events_since does. Draws are complete when logged.
+        pipeline = [{"$match": {"$or": [
+            {"operationType": "insert", "ns.coll": "draw_events"},
+            {"ns.coll": "meta", "documentKey._id": "state"},
+        ]}}]
+        seq = self.last_event_seq()
+        with self._db().watch(pipeline, full_document="updateLookup") as stream:
+            for change in stream:
+                if change["ns"]["coll"] == "draw_events":
+                    yield change["fullDocument"]
+                    continue
+                events = self._events_through(seq, utils.published_version(change.get("fullDocument") or {})[0])
+                if events:
+                    seq = max(event["seq"] for event in events)
+                    yield from events
+
+# Stored player columns: everything a view shows plus the CSV's contact fields
+SQLITE_PLAYER_COLUMNS = PLAYER_VIEWS["state"] + ["Age", "Phone Number"]
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    player_id INTEGER PRIMARY KEY,
+    "Name" TEXT NOT NULL,
+    "Flat No" INTEGER NOT NULL,
+    "Age" INTEGER,
+    "Phone Number" INTEGER,
+    "Skill" TEXT NOT NULL,
+    "Preferred Playing Position" TEXT,
+    "Batting Skill Level" TEXT,
+    "Bowler Skill Level" TEXT,
+    "Bowler Type" TEXT,
+    "Wicket Keeper" TEXT,
+    points INTEGER NOT NULL,
+    owner TEXT,
+    auction_price INTEGER NOT NULL DEFAULT 0,
+    auction_status TEXT NOT NULL DEFAULT 'regular',
+    _version INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS players_name_flat ON players ("Name", "Flat No");
+CREATE INDEX IF NOT EXISTS players_page ON players (points DESC, player_id);
+CREATE INDEX IF NOT EXISTS players_owner_page ON players (owner, points DESC, player_id);
+CREATE INDEX IF NOT EXISTS players_status_page ON players (auction_status, points DESC, player_id);
+CREATE INDEX IF NOT EXISTS players_skill_page ON players ("Skill", points DESC, player_id);
+CREATE INDEX IF NOT EXISTS players_version ON players (_version);
+CREATE TABLE IF NOT EXISTS teams (
+    team_name TEXT PRIMARY KEY,
+    budget INTEGER NOT NULL,
+    spent INTEGER NOT NULL DEFAULT 0,
+    remaining INTEGER NOT NULL,
+    roster_count INTEGER NOT NULL DEFAULT 0,
+    _version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS teams_version ON teams (_version);
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password_hash TEXT NOT NULL,
+    role TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS auction_events (
+    seq INTEGER PRIMARY KEY,
+    type TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    players TEXT NOT NULL,
+    fields TEXT NOT NULL,
+    undone INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS auction_events_type ON auction_events (type, seq);
+CREATE TABLE IF NOT EXISTS draw_queue (
+    player_id INTEGER PRIMARY KEY,
+    tier INTEGER NOT NULL,
+    rank INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS draw_queue_order ON draw_queue (tier, rank);
+CREATE TABLE IF NOT EXISTS draw_events (
+    seq INTEGER PRIMARY KEY,
+    ts TEXT NOT NULL,
+    drawn INTEGER,
+    passed INTEGER
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+SQLITE_COLUMNS = {
+    "players": SQLITE_PLAYER_COLUMNS,
+    "teams": TEAM_FIELDS,
+    "users": ["username", "password_hash", "role"],
+}
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+class _Conflict(Exception):
+    # Rolls a write transaction back without treating it as an error
+    pass
+
+
+class _SqliteStateCache(AuctionStateCache):
+    def __init__(self, storage):
+        super().__init__(storage.league)
+        self._storage = storage
+
+    def fetch(self, cached_version, cached_epoch):
+        return self._storage._fetch_state(cached_version, cached_epoch)
+
+
+class SqliteStorage(Storage):
+    """A whole league's auction in one local SQLite file.
+
+    One connection in WAL mode serves every session of the process behind a
+    lock, so reads never wait on the network and a sync job can read the file
+    while the auction runs. Each write is a single IMMEDIATE transaction that
+    bumps the version, updates rows and appends its event.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path=None, league=DEFAULT_LEAGUE):
+        self.league = league
+        self.config = get_league(league)
+        self.path = path or sqlite_path(league)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._cache = _SqliteStateCache(self)
+        # Tables exist before prepare() so reads never race the first load
+        self._legacy = self._upgrade_legacy_tables()
+        self._conn.executescript(SQLITE_SCHEMA)
+
+    # Plumbing
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def _scalar(self, sql, params=()):
+        with self._lock:
+            row = self._conn.execute(sql, params).fetchone()
+        return row[0] if row else None
+
+    def _meta(self, key, default=None):
+        value = self._scalar("SELECT value FROM meta WHERE key = ?", (key,))
+        return default if value is None else value
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value", (key, value))
+
+    @contextmanager
+    def _write(self, reload=False):
+        with self._transaction():
+            version = self._meta("version", 0) + 1
+            self._set_meta("version", version)
+            if reload:
+                self._set_meta("epoch", self._meta("epoch", 0) + 1)
+            yield version
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except _Conflict:
+                self._conn.execute("ROLLBACK")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._conn.execute("COMMIT")
+
+    def _record_event(self, version, event_type, changes=(), **fields):
+        self._conn.execute(
+            "INSERT INTO auction_events (seq, type, ts, players, fields) VALUES (?, ?, ?, ?, ?)",
+            (version, event_type, datetime.now(timezone.utc).isoformat(), json.dumps(list(changes)), json.dumps(fields)),
+        )
+
+    def _set_player(self, player_id, fields, version, where=None):
+        assignments = ", ".join(f"{_quote(column)} = ?" for column in fields)
+        conditions = "".join(f" AND {_quote(column)} IS ?" for column in (where or {}))
+        return self._conn.execute(
+            f"UPDATE players SET {assignments}, _version = ? WHERE player_id = ?{conditions}",
+            list(fields.values()) + [version, player_id] + list((where or {}).values()),
+        ).rowcount
+
+    def _charge(self, team_name, spent, players, version):
+        change = _ledger_change(spent, players)
+        return self._conn.execute(
+            "UPDATE teams SET spent = spent + ?, remaining = remaining + ?, roster_count = roster_count + ?, _version = ?"
+            " WHERE team_name = ? AND remaining >= ?",
+            (change["spent"], change["remaining"], change["roster_count"], version, team_name, spent),
+        ).rowcount
+
+    def _sync_draw_queue(self, player_ids):
+        seed = self._meta("draw_seed")
+        if seed is None:
+            return
+        for player in self._players_by_id(player_ids):
+            if player["owner"] is None:
+                self._conn.execute(
+                    "INSERT INTO draw_queue (player_id, tier, rank) VALUES (?, ?, ?)"
+                    " ON CONFLICT (player_id) DO UPDATE SET tier = excluded.tier",
+                    (player["player_id"], draw_tier(player["auction_status"], self.config.statuses), draw_rank(seed, player["player_id"])),
+                )
+            else:
+                self._conn.execute("DELETE FROM draw_queue WHERE player_id = ?", (player["player_id"],))
+
+    def _players_by_id(self, player_ids):
+        player_ids = list(player_ids)
+        placeholders = ", ".join("?" * len(player_ids))
+        return self._query(
+            f"SELECT player_id, owner, auction_price, auction_status FROM players WHERE player_id IN ({placeholders})",
+            player_ids,
+        )
+
+    def _build_draw_queue(self, seed=None):
+        seed = secrets.randbits(32) if seed is None else seed
+        self._conn.execute("DELETE FROM draw_queue")
+        self._conn.executemany(
+            "INSERT INTO draw_queue (player_id, tier, rank) VALUES (?, ?, ?)",
+            [
+                (player["player_id"], draw_tier(player["auction_status"], self.config.statuses), draw_rank(seed, player["player_id"]))
+                for player in self._query("SELECT player_id, auction_status FROM players WHERE owner IS NULL")
+            ],
+        )
+        self._set_meta("draw_seed", seed)
+        self._set_meta("draw_current", None)
+        return seed
+
+    def _replace_rows(self, table, frame):
+        columns = [column for column in SQLITE_COLUMNS[table] if column in frame.columns]
+        frame = frame[columns].astype(object).where(frame[columns].notna(), None)
+        self._conn.execute(f"DELETE FROM {table}")
+        self._conn.executemany(
+            f"INSERT INTO {table} ({', '.join(map(_quote, columns))}) VALUES ({', '.join('?' * len(columns))})",
+            frame.itertuples(index=False, name=None),
+        )
+        return len(frame)
+
+    # Loading
+
+    def _upgrade_legacy_tables(self):
+        # auction.db predates player ids, ledgers and hashed passwords: a
+        # plain pandas dump of the three collections. Its rows, including
+        # sales already made, are carried over into the current schema.
+        columns = [row["name"] for row in self._query("PRAGMA table_info(players)")]
+        if not columns or "player_id" in columns:
+            return None
+        legacy = {table: pd.read_sql(f"SELECT * FROM {table}", self._conn) for table in SQLITE_COLUMNS}
+        for table in SQLITE_COLUMNS:
+            self._conn.execute(f"DROP TABLE {table}")
+        players = legacy["players"]
+        players.insert(0, "player_id", range(1, len(players) + 1))
+        for column, default in PLAYER_BASELINE.items():
+            if column not in players.columns:
+                players[column] = default
+            elif default is not None:
+                players[column] = players[column].fillna(default)
+        players["auction_status"] = players["auction_status"].replace("end-auction", "end")
+        if "points" not in players.columns or players["points"].isna().any():
+            players["points"] = self.config.point_system.score(players)
+        teams = legacy["teams"].assign(**new_team_ledger(self.config.budget))
+        users = hash_users_frame(legacy["users"]) if "password" in legacy["users"].columns else legacy["users"]
+        logger.info(f"Upgrading legacy tables in {self.path} ({len(players)} players)")
+        return {"players": players, "teams": teams, "users": users}
+
+    def _read_sources(self, table_names):
+        paths = sources(self.league)
+        frames = {}
+        for table in table_names:
+            frames[table] = pd.concat(read_source(table, paths[table], self.config), ignore_index=True)
+        return frames
+
+    def _load_frames(self, frames):
+        # One transaction: sessions keep reading the previous data until the
+        # whole load commits
+        with self._write(reload=True) as version:
+            counts = {table: self._replace_rows(table, frame) for table, frame in frames.items()}
+            self._conn.execute("UPDATE players SET _version = ?", (version,))
+            self._conn.execute("UPDATE teams SET _version = ?", (version,))
+            self._rebuild_team_ledger()
+            seed = self._build_draw_queue()
+            changes = [
+                _player_change(player["player_id"], {}, {field: player[field] for field in PLAYER_BASELINE})
+                for player in self._query(
+                    "SELECT player_id, owner, auction_price, auction_status FROM players"
+                    " WHERE owner IS NOT NULL OR auction_status != 'regular'"
+                )
+            ]
+            self._record_event(version, "reset", changes, seed=seed)
+        logger.info(f"Loaded {counts} into {self.path}")
+        return counts
+
+    def _rebuild_team_ledger(self):
+        self._conn.execute(
+            "UPDATE teams SET"
+            " spent = (SELECT COALESCE(SUM(auction_price), 0) FROM players WHERE owner = teams.team_name),"
+            " roster_count = (SELECT COUNT(*) FROM players WHERE owner = teams.team_name)"
+        )
+        self._conn.execute("UPDATE teams SET remaining = budget - spent")
+
+    def prepare(self):
+        with self._lock:
+            if self._legacy:
+                self._load_frames(self._legacy)
+                self._legacy = None
+            empty = [table for table in SQLITE_COLUMNS if self.check_collection_empty(table)]
+            if empty:
+                self._load_frames(self._read_sources(empty))
+
+    # Reads
+
+    def _fetch_state(self, since_version, since_epoch):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                version, epoch = self._meta("version", 0), self._meta("epoch", 0)
+                if epoch == since_epoch and version == since_version:
+                    return version, epoch, None, None
+                since = since_version if epoch == since_epoch else -1
+                players = self._query(
+                    f"SELECT {', '.join(map(_quote, PLAYER_VIEWS['state']))} FROM players WHERE _version > ?", (since,)
+                )
+                teams = self._query(f"SELECT {', '.join(TEAM_FIELDS)} FROM teams WHERE _version > ?", (since,))
+                return version, epoch, players, teams
+            finally:
+                self._conn.execute("COMMIT")
+
+    def refresh(self):
+        self._cache.reset()
+
+    def get_auction_state(self):
+        return self._cache.snapshot()
+
+    def get_derived_view(self, version, name, build):
+        return self._cache.derived(version, name, build)
+
+    def page_players(self, filters, after=None, limit=PAGE_SIZE, view="state"):
+        conditions, params = [], []
+        for column, value in player_filter(**filters).items():
+            if value is None:
+                conditions.append(f"{_quote(column)} IS NULL")
+            elif value == {"$ne": None}:
+                conditions.append(f"{_quote(column)} IS NOT NULL")
+            else:
+                conditions.append(f"{_quote(column)} = ?")
+                params.append(value)
+        if after is not None:
+            conditions.append("(points < ? OR (points = ? AND player_id > ?))")
+            params += [after[0], after[0], after[1]]
+        fields = PLAYER_VIEWS[view]
+        rows = self._query(
+            f"SELECT {', '.join(map(_quote, fields))} FROM players"
+            f"{' WHERE ' + ' AND '.join(conditions) if conditions else ''}"
+            " ORDER BY points DESC, player_id LIMIT ?",
+            params + [limit + 1],
+        )
+        next_after = (rows[limit - 1]["points"], rows[limit - 1]["player_id"]) if len(rows) > limit else None
+        return players_frame(rows[:limit], fields, categories=self.config.categories), next_after
+
+    def authenticate(self, username, password):
+        user = self._query("SELECT password_hash, role FROM users WHERE username = ?", (username,))
+        if not user or not verify_password(password, user[0]["password_hash"]):
+            return None
+        return user[0]["role"]
+
+    def get_current_draw(self):
+        return self._meta("draw_current")
+
+    def load_data(self, collection_name):
+        with self._lock:
+            return pd.read_sql(f"SELECT * FROM {collection_name}", self._conn)
+
+    def check_collection_empty(self, collection_name):
+        return not self._scalar(f"SELECT EXISTS (SELECT 1 FROM {collection_name})")
+
+    def last_event_seq(self):
+        return self._scalar("SELECT COALESCE(MAX(seq), 0) FROM auction_events")
+
+    def events_since(self, seq):
+        return self._query("SELECT seq, type FROM auction_events WHERE seq > ? ORDER BY seq", (seq,))
+
+    def last_draw_seq(self):
+        return self._scalar("SELECT COALESCE(MAX(seq), 0) FROM draw_events")
+
+    def draws_since(self, seq):
+        return self._query("SELECT seq, 'draw' AS type FROM draw_events WHERE seq > ? ORDER BY seq", (seq,))
+
+    # Writes
+
+    def commit_sale(self, player_id, team_name, auction_price):
+        player_id, auction_price = int(player_id), int(auction_price)
+        result = SaleResult.ALREADY_SOLD
+        with self._write() as version:
+            if not self._set_player(player_id, {"owner": team_name, "auction_price": auction_price}, version, where={"owner": None}):
+                raise _Conflict()
+            if not self._charge(team_name, auction_price, 1, version):
+                result = SaleResult.INSUFFICIENT_BUDGET
+                raise _Conflict()
+            self._conn.execute("DELETE FROM draw_queue WHERE player_id = ?", (player_id,))
+            if self._meta("draw_current") == player_id:
+                self._set_meta("draw_current", None)
+            self._record_event(version, "sale", [_player_change(
+                player_id,
+                {"owner": None, "auction_price": 0},
+                {"owner": team_name, "auction_price": auction_price},
+            )])
+            result = SaleResult.SOLD
+        logger.info(f"Sale of player {player_id} to {team_name} for {auction_price}: {result.value}")
+        return result
+
+    def undo_auction(self, player_id):
+        player_id = int(player_id)
+        undone = False
+        with self._write() as version:
+            previous = self._players_by_id([player_id])
+            if not previous or previous[0]["owner"] is None:
+                raise _Conflict()
+            previous = previous[0]
+            self._set_player(player_id, {"owner": None, "auction_price": 0}, version)
+            self._charge(previous["owner"], -previous["auction_price"], -1, version)
+            self._sync_draw_queue([player_id])
+            self._record_event(version, "undo", [_player_change(
+                player_id,
+                {"owner": previous["owner"], "auction_price": previous["auction_price"]},
+                {"owner": None, "auction_price": 0},
+            )])
+            undone = True
+        if undone:
+            logger.info(f"Auction undone for player: {player_id}")
+        else:
+            logger.warning(f"Failed to undo auction for player: {player_id}")
+        return undone
+
+    def mark_players_status(self, player_ids, status):
+        player_ids = [int(player_id) for player_id in player_ids]
+        if not player_ids:
+            return BulkResult(0, 0)
+        with self._write() as version:
+            previous = {player["player_id"]: player["auction_status"] for player in self._players_by_id(player_ids)}
+            changed = [player_id for player_id, before in previous.items() if before != status]
+            for player_id in changed:
+                self._set_player(player_id, {"auction_status": status}, version)
+            self._record_event(version, "status", [
+                _player_change(player_id, {"auction_status": previous[player_id]}, {"auction_status": status})
+                for player_id in changed
+            ])
+            self._sync_draw_queue(changed)
+        result = BulkResult(len(previous), len(changed))
+        logger.info(f"Marked players as {status}: {result.matched} matched, {result.modified} changed")
+        return result
+
+    def reset_auction_data(self):
+        with self._write() as version:
+            players = self._conn.execute(
+                "UPDATE players SET owner = NULL, auction_price = 0, auction_status = 'regular', _version = ?", (version,)
+            ).rowcount
+            budget = self.config.budget
+            teams = self._conn.execute(
+                "UPDATE teams SET budget = ?, spent = 0, remaining = ?, roster_count = 0, _version = ?", (budget, budget, version)
+            ).rowcount
+            self._record_event(version, "reset", seed=self._build_draw_queue())
+        logger.info(f"Auction data reset successfully ({players} players, {teams} teams).")
+        return BulkResult(players, players), BulkResult(teams, teams)
+
+    def reload_from_csv(self):
+        return self._load_frames(self._read_sources(SOURCE_FILES))
+
+    def _revert_event(self, event):
+        changes = [_player_change(change["player_id"], change["after"], change["before"]) for change in json.loads(event["players"])]
+        reverted = False
+        with self._write() as version:
+            # Players are only reverted while still in the state the event left them in
+            applied = [
+                change for change in changes
+                if self._set_player(change["player_id"], change["after"], version, where=change["before"])
+            ]
+            for team_name, (spent, players) in _team_deltas(applied).items():
+                if not self._charge(team_name, spent, players, version):
+                    # Re-selling an undone player the team can no longer afford
+                    raise _Conflict()
+            self._sync_draw_queue(change["player_id"] for change in applied)
+            self._conn.execute("UPDATE auction_events SET undone = 1 WHERE seq = ?", (event["seq"],))
+            self._record_event(version, "revert", applied, reverts=event["seq"])
+            reverted = True
+        return reverted
+
+    def undo_last_events(self, count=1):
+        last_reset = self._scalar("SELECT MAX(seq) FROM auction_events WHERE type = 'reset'") or 0
+        placeholders = ", ".join("?" * len(REVERSIBLE_EVENTS))
+        events = self._query(
+            f"SELECT seq, type, players FROM auction_events WHERE type IN ({placeholders}) AND undone = 0 AND seq > ?"
+            " ORDER BY seq DESC LIMIT ?",
+            REVERSIBLE_EVENTS + [last_reset, int(count)],
+        )
+        reverted = []
+        for event in events:
+            if not self._revert_event(event):
+                logger.warning(f"Could not revert auction event {event['seq']} ({event['type']})")
+                break
+            reverted.append(event["seq"])
+        logger.info(f"Reverted auction events: {reverted}")
+        return reverted
+
+    def draw_next_player(self):
+        # Outside the data version, as in utils.draw_next_player
+        with self._transaction():
+            passed = self._meta("draw_current")
+            entry = self._query("SELECT tier FROM draw_queue WHERE player_id = ?", (passed,))
+            if entry:
+                # Still unsold: to the back of its tier
+                self._conn.execute(
+                    "UPDATE draw_queue SET rank = (SELECT MAX(rank) + 1 FROM draw_queue WHERE tier = ?) WHERE player_id = ?",
+                    (entry[0]["tier"], passed),
+                )
+            current = self._scalar("SELECT player_id FROM draw_queue ORDER BY tier, rank LIMIT 1")
+            self._set_meta("draw_current", current)
+            self._conn.execute(
+                "INSERT INTO draw_events (ts, drawn, passed) VALUES (?, ?, ?)",
+                (datetime.now(timezone.utc).isoformat(), current, passed if entry else None),
+            )
+        logger.info(f"Drew player {current} for auction")
+        return current
+
+    def save_data(self, collection_name, data):
+        with self._write(reload=True):
+            self._replace_rows(collection_name, data)
+
+    def restore_state(self, state, **fields):
+        with self._write(reload=True) as version:
+            for table in ("players", "teams"):
+                self._replace_rows(table, pd.DataFrame(state[table]))
+                self._conn.execute(f"UPDATE {table} SET _version = ?", (version,))
+            self._conn.execute("DELETE FROM draw_queue")
+            self._conn.executemany(
+                "INSERT INTO draw_queue (player_id, tier, rank) VALUES (?, ?, ?)",
+                [(entry["player_id"], entry["tier"], entry["rank"]) for entry in state["draw_queue"]],
+            )
+            self._set_meta("draw_seed", state["draw_seed"])
+            self._set_meta("draw_current", state["draw_current"])
+            self._record_event(version, "reset", _baseline_changes(state["players"]), seed=state["draw_seed"], **fields)
+        logger.info(f"Restored {len(state['players'])} players and {len(state['teams'])} teams as version {version}")
+        return version
+
+    def export_state(self):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                return {
+                    "version": self._meta("version", 0),
+                    "synced_version": self._meta("synced_version", 0),
+                    "draw_seed": self._meta("draw_seed"),
+                    "draw_current": self._meta("draw_current"),
+                    "players": self._query(f"SELECT {', '.join(map(_quote, SQLITE_PLAYER_COLUMNS))} FROM players"),
+                    "teams": self._query(f"SELECT {', '.join(TEAM_FIELDS)} FROM teams"),
+                    "users": self._query("SELECT username, password_hash, role FROM users"),
+                    "draw_queue": self._query("SELECT player_id, tier, rank FROM draw_queue"),
+                }
+            finally:
+                self._conn.execute("COMMIT")
+
+    # For sync.py
+
+    def mark_synced(self, version):
+        with self._lock:
+            self._set_meta("synced_version", version)
+
+
+STORAGE_BACKENDS = {
+    "mongo": MongoStorage,
+    "sqlite": SqliteStorage,
+}
+
+
+@st.cache_resource
+def get_storage(league=DEFAULT_LEAGUE):
+    # One per league; Mongo storages all share the pooled client in utils
+    if STORAGE_BACKEND not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown HPL_STORAGE backend {STORAGE_BACKEND!r}; expected one of {list(STORAGE_BACKENDS)}")
+    logger.info(f"Using {STORAGE_BACKEND} storage for league {league}")
+    return STORAGE_BACKENDS[STORAGE_BACKEND](league=league)
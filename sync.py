@@ -0,0 +1,79 @@
+"""Push an auction run on local SQLite storage to MongoDB.
+
+    HPL_STORAGE=sqlite streamlit run main.py     # the auction itself
+    python sync.py [--league NAME] [--every SECONDS]   # now, or on a loop until stopped
+
+Each sync replaces Mongo's players, teams and users with the local state in
+one versioned write and logs it as a reset event carrying every player that
+differs from the baseline, so Mongo's event log still replays to the synced
+state. Nothing is sent while the local version is unchanged.
+"""
+import argparse
+import logging
+import time
+
+from pymongo import DeleteMany, ReplaceOne
+
+from leagues import DEFAULT_LEAGUE, LEAGUES, get_league
+from storage import SqliteStorage
+from utils import (
+    PLAYER_BASELINE,
+    _player_change,
+    build_draw_queue,
+    get_db_connection,
+    record_event,
+    versioned_write,
+)
+
+logger = logging.getLogger(__name__)
+
+SYNC_KEYS = {"players": "player_id", "teams": "team_name", "users": "username"}
+
+
+def _replace_collection(collection, key, docs):
+    operations = [ReplaceOne({key: doc[key]}, doc, upsert=True) for doc in docs]
+    operations.append(DeleteMany({key: {"$nin": [doc[key] for doc in docs]}}))
+    collection.bulk_write(operations, ordered=False)
+
+
+def sync_to_mongo(local):
+    state = local.export_state()
+    if state["version"] == state["synced_version"]:
+        logger.info(f"Mongo already has local version {state['version']}")
+        return False
+    client = get_db_connection()
+    db = client[get_league(local.league).database]
+    with versioned_write(db, reload=True) as version:
+        for table, key in SYNC_KEYS.items():
+            docs = [dict(row, _version=version) for row in state[table]] if table != "users" else state[table]
+            _replace_collection(db[table], key, docs)
+        build_draw_queue(db, state["draw_seed"])
+        db.meta.update_one({"_id": "draw"}, {"$set": {"current": state["draw_current"]}})
+        changes = [
+            _player_change(player["player_id"], {}, {field: player[field] for field in PLAYER_BASELINE})
+            for player in state["players"]
+            if any(player[field] != value for field, value in PLAYER_BASELINE.items())
+        ]
+        record_event(db, version, "reset", changes, source="sqlite", local_version=state["version"], seed=state["draw_seed"])
+    local.mark_synced(state["version"])
+    logger.info(f"Synced local version {state['version']} to Mongo version {version}")
+    return True
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Push local SQLite auction state to MongoDB")
+    parser.add_argument("--league", default=DEFAULT_LEAGUE, choices=list(LEAGUES))
+    parser.add_argument("--path", help="the league's SQLite file, if not the default one")
+    parser.add_argument("--every", type=float, help="keep syncing every SECONDS; failures are retried")
+    args = parser.parse_args()
+    local = SqliteStorage(args.path, args.league)
+    if args.every is None:
+        sync_to_mongo(local)
+    else:
+        while True:
+            try:
+                sync_to_mongo(local)
+            except Exception as e:
+                logger.error(f"Sync to Mongo failed, retrying in {args.every}s: {e}")
+            time.sleep(args.every)
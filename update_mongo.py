@@ -1,25 +1,9 @@
-from pymongo import MongoClient
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# MongoDB connection
-uri = os.getenv("MONGODB_URI")
-client = MongoClient(uri)
-db = client['hpl_auction']
-
-def update_players_collection():
-    players = db.players.find({})
-    for player in players:
-        if 'auction_status' not in player:
-            db.players.update_one(
-                {'_id': player['_id']},
-                {'$set': {'auction_status': 'regular'}}
-            )
-    print("Players collection updated successfully.")
+import sys
+from migrations import MIGRATIONS, migrate
 
 if __name__ == "__main__":
-    update_players_collection()
-    print("MongoDB update completed.")
\ No newline at end of file
+    # python update_mongo.py [league]
+    applied = migrate(*sys.argv[1:2])
+    for version, name in applied:
+        print(f"Applied migration {version}: {name}")
+    print(f"MongoDB schema is at version {MIGRATIONS[-1][0]} ({len(applied)} migrations applied).")
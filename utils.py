@@ -1,11 +1,23 @@
 import os
 import ssl
 import logging
+import time
+import secrets
+import hashlib
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from contextlib import contextmanager
+from enum import Enum
 import pandas as pd
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, ConfigurationError
+from pymongo import ASCENDING, DESCENDING, DeleteOne, IndexModel, MongoClient, ReturnDocument, UpdateMany, UpdateOne
+from pymongo.errors import ConnectionFailure, ConfigurationError, DuplicateKeyError
 from dotenv import load_dotenv
 import streamlit as st
+from auth import find_user_role
+from instrumentation import bind, event_listeners, traced
+from leagues import DEFAULT_LEAGUE, get_league, league_of
 
 # Load environment variables
 load_dotenv()
@@ -14,6 +26,95 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+BulkResult = namedtuple("BulkResult", ["matched", "modified"])
+
+# Auction fields of a player that has never been sold or marked
+PLAYER_BASELINE = {"owner": None, "auction_price": 0, "auction_status": "regular"}
+
+# The default league's tiers and categoricals; see leagues.League for others
+AUCTION_STATUSES = get_league().statuses
+PLAYER_CATEGORIES = get_league().categories
+PLAYER_INTEGERS = ["player_id", "Flat No", "points", "auction_price"]
+
+PLAYER_DETAILS = [
+    "player_id", "Name", "Flat No", "Skill", "Preferred Playing Position", "Batting Skill Level",
+    "Bowler Skill Level", "Bowler Type", "Wicket Keeper", "points",
+]
+
+# Fields fetched for each view. Anything no tab shows (_id, Phone Number,
+# Age) stays in the database.
+PLAYER_VIEWS = {
+    "state": PLAYER_DETAILS + ["owner", "auction_price", "auction_status"],
+    "auctioned": PLAYER_DETAILS + ["owner", "auction_price"],
+    "unauctioned": PLAYER_DETAILS + ["auction_status"],
+}
+TEAM_FIELDS = ["team_name", "budget", "spent", "remaining", "roster_count"]
+
+# Paged player tables: highest points first, player_id breaking ties, so a
+# page boundary is a (points, player_id) pair rather than an offset
+PAGE_SIZE = 50
+PLAYER_ORDER = [("points", DESCENDING), ("player_id", ASCENDING)]
+
+# Events that undo_last_events can revert; resets are a hard boundary
+REVERSIBLE_EVENTS = ["sale", "undo", "status"]
+
+class SaleResult(Enum):
+    SOLD = "sold"
+    ALREADY_SOLD = "already sold"
+    INSUFFICIENT_BUDGET = "insufficient budget"
+
+# Every hot filter in this module is backed by one of these. Players are
+# addressed by the stable integer player_id assigned at load time.
+INDEXES = {
+    "players": [
+        ([("player_id", ASCENDING)], {"unique": True}),
+        ([("Name", ASCENDING), ("Flat No", ASCENDING)], {"unique": True}),
+        # Paged tables: each filter followed by the page order
+        ([("points", DESCENDING), ("player_id", ASCENDING)], {}),
+        ([("owner", ASCENDING), ("points", DESCENDING), ("player_id", ASCENDING)], {}),
+        ([("auction_status", ASCENDING), ("points", DESCENDING), ("player_id", ASCENDING)], {}),
+        ([("Skill", ASCENDING), ("points", DESCENDING), ("player_id", ASCENDING)], {}),
+        ([("_version", ASCENDING)], {}),
+    ],
+    "teams": [
+        ([("team_name", ASCENDING)], {"unique": True}),
+        ([("_version", ASCENDING)], {}),
+    ],
+    "users": [
+        ([("username", ASCENDING)], {"unique": True}),
+    ],
+    "auction_events": [
+        ([("seq", ASCENDING)], {"unique": True}),
+        ([("type", ASCENDING), ("seq", ASCENDING)], {}),
+    ],
+    "draw_queue": [
+        ([("player_id", ASCENDING)], {"unique": True}),
+        ([("tier", ASCENDING), ("rank", ASCENDING)], {}),
+    ],
+    "draw_events": [
+        ([("seq", ASCENDING)], {"unique": True}),
+    ],
+}
+
+# One pooled client serves every league; each league is a database on it
+MONGO_POOL_SIZE = int(os.getenv("HPL_MONGO_POOL_SIZE", "100"))
+
+# Serialize one process's writes to the same database; reads never take it.
+# Leagues never wait on each other.
+_write_locks = {}
+
+def write_lock(database):
+    return _write_locks.setdefault(database, threading.RLock())
+
+# Independent reads are issued side by side so a cold start or full reload
+# costs a few round trips of latency rather than the sum of all of them.
+# pymongo clients are thread-safe and pool their connections.
+_read_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hpl-read")
+
+def run_concurrently(*calls):
+    futures = [_read_pool.submit(bind(call)) for call in calls]
+    return [future.result() for future in futures]
+
 @st.cache_resource
 def get_db_connection():
     uri = os.getenv("MONGODB_URI")
@@ -23,7 +124,7 @@ def get_db_connection():
     logger.info("Attempting to connect to MongoDB")
     
     try:
-        client = MongoClient(uri)
+        client = MongoClient(uri, maxPoolSize=MONGO_POOL_SIZE, event_listeners=event_listeners())
         # The ismaster command is cheap and does not require auth.
         client.admin.command('ismaster')
         logger.info("Successfully connected to MongoDB")
@@ -32,148 +133,821 @@ def get_db_connection():
         logger.error(f"Could not connect to MongoDB: {e}")
         raise
 
-def init_db():
+# A write claims its version before touching any document but leaves it in
+# "pending" until those documents have landed. Readers in every process only
+# record versions below all pending writes, so a cache never records a
+# version whose documents it has not read. A claim left by a process that
+# died mid-write stops holding readers back after PENDING_TIMEOUT seconds.
+PENDING_TIMEOUT = 600
+
+# Last version claimed per database, so a claim is usually one round trip
+_claimed = {}
+
+def claim_data_version(db):
+    # Compare-and-swap on "version", retried when another process got there first
+    current = _claimed.get(db.name)
+    while True:
+        if current is None:
+            current = (db.meta.find_one({"_id": "state"}, {"version": 1}) or {}).get("version", 0)
+        version = current + 1
+        try:
+            claimed = db.meta.update_one(
+                {"_id": "state", "version": current or {"$in": [None, 0]}},
+                {"$set": {"version": version}, "$push": {"pending": {"version": version, "at": time.time()}}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            claimed = None
+        if claimed is not None and (claimed.matched_count or claimed.upserted_id is not None):
+            _claimed[db.name] = version
+            return version
+        current = None
+
+def publish_data_version(db, version, reload=False):
+    # "epoch" only moves when whole collections were replaced and cached
+    # snapshots must be rebuilt from scratch, and only once they are in place
+    update = {"$pull": {"pending": {"version": version}}}
+    if reload:
+        update["$inc"] = {"epoch": 1}
+    db.meta.update_one({"_id": "state"}, update)
+
+def published_version(state):
+    # (version, epoch) a reader of the meta state document may record
+    now = time.time()
+    pending = [claim["version"] for claim in state.get("pending", []) if now - claim["at"] < PENDING_TIMEOUT]
+    return (min(pending) - 1 if pending else state.get("version", 0)), state.get("epoch", 0)
+
+@contextmanager
+def versioned_write(db, reload=False):
+    with write_lock(db.name):
+        version = claim_data_version(db)
+        try:
+            yield version
+        finally:
+            publish_data_version(db, version, reload)
+
+def _supports_transactions(client):
+    topology = getattr(client, "topology_description", None)
+    return topology is not None and topology.topology_type_name in ("ReplicaSetWithPrimary", "Sharded", "LoadBalanced")
+
+def run_atomically(client, callback):
+    # Player and team documents change together. Replica sets (Atlas) commit
+    # both writes in one transaction; standalone servers run them in order.
+    if not _supports_transactions(client):
+        return callback(None)
+    with client.start_session() as session:
+        return session.with_transaction(callback)
+
+def _ledger_change(price, players):
+    return {"spent": price, "remaining": -price, "roster_count": players}
+
+def new_team_ledger(budget):
+    return {"budget": budget, "spent": 0, "remaining": budget, "roster_count": 0}
+
+def _player_change(player_id, before, after):
+    return {"player_id": player_id, "before": before, "after": after}
+
+def record_event(db, version, event_type, changes=(), session=None, **fields):
+    # The auction_events log is append-only and shares its sequence with the
+    # data version, so event N is exactly the write that produced version N.
+    event = dict(fields, seq=version, type=event_type, players=list(changes), ts=datetime.now(timezone.utc))
+    db.auction_events.insert_one(event, session=session)
+
+def _team_deltas(changes):
+    # Net (spent, roster_count) movement per team implied by player changes
+    deltas = {}
+    for change in changes:
+        for state, sign in ((change["before"], -1), (change["after"], 1)):
+            if state.get("owner") is not None:
+                spent, players = deltas.get(state["owner"], (0, 0))
+                deltas[state["owner"]] = (spent + sign * state.get("auction_price", 0), players + sign)
+    return deltas
+
+def _ensure_collection_indexes(collection, indexes):
+    collection.create_indexes([IndexModel(keys, **options) for keys, options in indexes])
+    existing = {tuple(index["key"]) for index in collection.index_information().values()}
+    return [keys for keys, _ in indexes if tuple(keys) not in existing]
+
+def ensure_indexes(db):
+    # create_indexes is a no-op for indexes that already exist with the same
+    # spec, so this is safe to run on every start. One createIndexes and one
+    # listIndexes per collection, all collections at once.
+    missing = run_concurrently(*(
+        lambda name=name, indexes=indexes: _ensure_collection_indexes(db[name], indexes)
+        for name, indexes in INDEXES.items()
+    ))
+    for collection_name, keys in zip(INDEXES, missing):
+        if keys:
+            raise RuntimeError(f"Missing indexes on {collection_name}: {keys}")
+
+def assign_player_ids(db):
+    # Backfill for players loaded before player_id existed; new ids continue
+    # after the highest one already assigned.
+    missing = list(db.players.find({"player_id": {"$exists": False}}, {"_id": 1}).sort("_id", ASCENDING))
+    if not missing:
+        return
+    last = db.players.find_one({"player_id": {"$exists": True}}, {"player_id": 1}, sort=[("player_id", -1)])
+    next_id = last["player_id"] + 1 if last else 1
+    write_fields(db, "players", [({"_id": doc["_id"]}, {"player_id": next_id + i}) for i, doc in enumerate(missing)])
+    logger.info(f"Assigned player ids to {len(missing)} players")
+
+def rebuild_team_ledger(db):
+    # Recompute spent, remaining and roster_count from the players collection.
+    # Only needed for teams created before the ledger fields existed.
+    totals = {
+        row["_id"]: row
+        for row in db.players.aggregate([
+            {"$match": {"owner": {"$ne": None}}},
+            {"$group": {"_id": "$owner", "spent": {"$sum": "$auction_price"}, "roster_count": {"$sum": 1}}},
+        ])
+    }
+    updates = []
+    for team in db.teams.find({}, {"team_name": 1, "budget": 1}):
+        ledger = new_team_ledger(team.get("budget", league_of(db).budget))
+        sold = totals.get(team["team_name"], {})
+        ledger["spent"] = sold.get("spent", 0)
+        ledger["remaining"] = ledger["budget"] - ledger["spent"]
+        ledger["roster_count"] = sold.get("roster_count", 0)
+        updates.append(({"_id": team["_id"]}, ledger))
+    return write_fields(db, "teams", updates)
+
+def start_event_log(db):
+    # Seed an empty log with the current state so a replay reproduces sales
+    # and marks made before the log existed.
+    changes = [
+        _player_change(doc["player_id"], {}, {field: doc.get(field, value) for field, value in PLAYER_BASELINE.items()})
+        for doc in db.players.find(
+            {"$or": [{"owner": {"$ne": None}}, {"auction_status": {"$nin": [None, "regular"]}}]},
+            {"player_id": 1, "owner": 1, "auction_price": 1, "auction_status": 1},
+        )
+    ]
+    with versioned_write(db) as version:
+        record_event(db, version, "reset", changes)
+
+def draw_rank(seed, player_id):
+    # Position within a tier, fixed by the recorded seed so the draw order can
+    # be replayed for audit
+    digest = hashlib.blake2b(f"{seed}:{player_id}".encode(), digest_size=7).digest()
+    return int.from_bytes(digest, "big")
+
+def draw_tier(status, statuses=AUCTION_STATUSES):
+    return statuses.index(status) if status in statuses else statuses.index("regular")
+
+def build_draw_queue(db, seed=None):
+    # The queue holds exactly the unsold players, ordered by the league's
+    # tiers (prime, regular, end by default) and then by their seeded rank.
+    seed = secrets.randbits(32) if seed is None else seed
+    statuses = league_of(db).statuses
+    db.draw_queue.delete_many({})
+    entries = [
+        {"player_id": doc["player_id"], "tier": draw_tier(doc.get("auction_status"), statuses), "rank": draw_rank(seed, doc["player_id"])}
+        for doc in db.players.find({"owner": None}, {"player_id": 1, "auction_status": 1})
+    ]
+    if entries:
+        db.draw_queue.insert_many(entries, ordered=False)
+    db.meta.update_one({"_id": "draw"}, {"$set": {"seed": seed, "current": None}}, upsert=True)
+    logger.info(f"Built draw queue of {len(entries)} players with seed {seed}")
+    return seed
+
+def _sync_draw_queue(db, player_ids, session=None):
+    # Incremental upkeep after sales, undos and status marks: unsold players
+    # are (re)queued in their tier, keeping any rank they already have, and
+    # sold players leave the queue.
+    draw = db.meta.find_one({"_id": "draw"}, {"seed": 1}, session=session)
+    if draw is None:
+        return
+    statuses = league_of(db).statuses
+    operations = []
+    for doc in db.players.find({"player_id": {"$in": list(player_ids)}}, {"player_id": 1, "owner": 1, "auction_status": 1}, session=session):
+        if doc.get("owner") is None:
+            operations.append(UpdateOne(
+                {"player_id": doc["player_id"]},
+                {"$set": {"tier": draw_tier(doc.get("auction_status"), statuses)}, "$setOnInsert": {"rank": draw_rank(draw["seed"], doc["player_id"])}},
+                upsert=True,
+            ))
+        else:
+            operations.append(DeleteOne({"player_id": doc["player_id"]}))
+    if operations:
+        db.draw_queue.bulk_write(operations, ordered=False, session=session)
+
+@traced
+def init_db(league=DEFAULT_LEAGUE):
     try:
         client = get_db_connection()
-        db = client['hpl_auction']
+        db = client[get_league(league).database]
         
         # Create collections if they don't exist
+        existing = set(db.list_collection_names())
         for collection in ['users', 'players', 'teams']:
-            if collection not in db.list_collection_names():
+            if collection not in existing:
                 db.create_collection(collection)
 
+        # Data backfills live in migrations.py and run before this
+        ensure_indexes(db)
+
         logger.info("Database initialized successfully.")
     except Exception as e:
         logger.error(f"Error initializing database: {e}")
         raise
 
-def load_data(collection_name):
+@traced
+def load_data(collection_name, league=DEFAULT_LEAGUE):
     client = get_db_connection()
-    db = client['hpl_auction']
+    db = client[get_league(league).database]
     data = list(db[collection_name].find())
     return pd.DataFrame(data)
 
-def save_data(collection_name, data):
+@traced
+def save_data(collection_name, data, league=DEFAULT_LEAGUE):
     client = get_db_connection()
-    db = client['hpl_auction']
-    db[collection_name].delete_many({})
-    if not data.empty:
-        db[collection_name].insert_many(data.to_dict('records'))
+    db = client[get_league(league).database]
+    with versioned_write(db, reload=True) as version:
+        db[collection_name].delete_many({})
+        if not data.empty:
+            records = data.to_dict('records')
+            for record in records:
+                record["_version"] = version
+            db[collection_name].insert_many(records)
 
-def update_auction_status(player_name, team_name, auction_price):
-    client = get_db_connection()
-    db = client['hpl_auction']
-    db.players.update_one(
-        {"Name": player_name},
-        {"$set": {"owner": team_name, "auction_price": auction_price}}
-    )
+def write_fields(db, collection_name, updates, many=False):
+    # One unordered bulk_write for any number of (filter, fields) pairs, so a
+    # batch costs a single round trip instead of one per document.
+    updates = list(updates)
+    if not updates:
+        return BulkResult(0, 0)
+    operation = UpdateMany if many else UpdateOne
+    with versioned_write(db) as version:
+        result = db[collection_name].bulk_write(
+            [operation(query, {"$set": dict(fields, _version=version)}) for query, fields in updates],
+            ordered=False,
+        )
+    return BulkResult(result.matched_count, result.modified_count)
 
-@st.cache_data(ttl=600)
-def fetch_auctioned_players():
-    client = get_db_connection()
-    db = client['hpl_auction']
-    return pd.DataFrame(list(db.players.find({"owner": {"$ne": None}})))
+def projection(fields):
+    return dict({field: 1 for field in fields}, _id=0)
 
-@st.cache_data(ttl=600)
-def fetch_unauctioned_players():
-    client = get_db_connection()
-    db = client['hpl_auction']
-    return pd.DataFrame(list(db.players.find({"owner": None})))
+def _as_category(values, vocabulary):
+    # Unexpected values become extra categories instead of being dropped
+    categorical = pd.Categorical(values)
+    extra = [value for value in categorical.categories if value not in vocabulary]
+    return categorical.set_categories(list(vocabulary) + extra)
+
+def _as_small_int(values):
+    try:
+        return pd.to_numeric(values, downcast="integer")
+    except (TypeError, ValueError):
+        return values
+
+def players_frame(docs, fields, team_names=(), categories=PLAYER_CATEGORIES):
+    players_df = pd.DataFrame(list(docs), columns=fields)
+    # Migrations guarantee every player has its auction fields and points,
+    # so there is nothing to fill in here
+    for col, vocabulary in categories.items():
+        if col in players_df.columns:
+            players_df[col] = _as_category(players_df[col], vocabulary)
+    if "owner" in players_df.columns:
+        players_df["owner"] = _as_category(players_df["owner"], team_names)
+    for col in PLAYER_INTEGERS:
+        if col in players_df.columns:
+            players_df[col] = _as_small_int(players_df[col])
+    return players_df
 
-def check_collection_empty(collection_name):
+def teams_frame(docs):
+    teams_df = pd.DataFrame(list(docs), columns=TEAM_FIELDS)
+    # One row per team, so budgets keep full-width ints for safe arithmetic
+    for col in TEAM_FIELDS[1:]:
+        teams_df[col] = teams_df[col].fillna(0).astype("int64")
+    return teams_df
+
+@traced
+def load_players(view="state", query=None, league=DEFAULT_LEAGUE):
     client = get_db_connection()
-    db = client['hpl_auction']
-    return db[collection_name].count_documents({}) == 0
+    db = client[get_league(league).database]
+    fields = PLAYER_VIEWS[view]
+    return players_frame(db.players.find(query or {}, projection(fields)), fields, categories=get_league(league).categories)
+
+def player_filter(skill=None, status=None, owner=None, sold=None):
+    # A team implies sold; sold=False is the unauctioned pool
+    query = {}
+    if skill is not None:
+        query["Skill"] = skill
+    if status is not None:
+        query["auction_status"] = status
+    if owner is not None:
+        query["owner"] = owner
+    elif sold is not None:
+        query["owner"] = {"$ne": None} if sold else None
+    return query
+
+def after_cursor(after):
+    points, player_id = after
+    return {"$or": [{"points": {"$lt": points}}, {"points": points, "player_id": {"$gt": player_id}}]}
 
-def mark_player_status(player_name, status):
+@traced
+def fetch_players_page(filters, after=None, limit=PAGE_SIZE, view="state", league=DEFAULT_LEAGUE):
+    # One page of players matching filters, in PLAYER_ORDER, starting after
+    # the cursor of the previous page. Returns the page and the cursor of
+    # the next one (None on the last page).
     client = get_db_connection()
-    db = client['hpl_auction']
-    db.players.update_one(
-        {"Name": player_name},
-        {"$set": {"auction_status": status}}
-    )
+    db = client[get_league(league).database]
+    query = player_filter(**filters)
+    if after is not None:
+        query = {"$and": [query, after_cursor(after)]}
+    fields = PLAYER_VIEWS[view]
+    docs = list(db.players.find(query, projection(fields), sort=PLAYER_ORDER, limit=limit + 1))
+    next_after = (docs[limit - 1]["points"], docs[limit - 1]["player_id"]) if len(docs) > limit else None
+    return players_frame(docs[:limit], fields, categories=get_league(league).categories), next_after
+
+class AuctionStateCache:
+    """Process-wide snapshot of one league's players and teams collections.
+
+    Every rerun costs one lookup of the ``meta`` state document; documents are
+    only re-read when their ``_version`` is newer than the cached snapshot.
+    """
+
+    def __init__(self, league=DEFAULT_LEAGUE):
+        self.league = get_league(league)
+        self.version = 0
+        self.epoch = None
+        self._players = {}
+        self._teams = {}
+        self._frames = (pd.DataFrame(), pd.DataFrame())
+        self._views = {}
+        self._views_version = None
+        self._lock = threading.Lock()
+
+    def fetch(self, cached_version, cached_epoch):
+        # (version, epoch, players, teams): every document when the epoch has
+        # moved, only those written since the cached version otherwise, and
+        # no documents at all when nothing has changed. Other storage
+        # backends override this.
+        client = get_db_connection()
+        db = client[self.league.database]
+        version, epoch = published_version(db.meta.find_one({"_id": "state"}) or {})
+        if epoch == cached_epoch and version == cached_version:
+            return version, epoch, None, None
+        changed = {"_version": {"$gt": cached_version}} if epoch == cached_epoch else {}
+        players, teams = run_concurrently(
+            lambda: list(db.players.find(changed, projection(PLAYER_VIEWS["state"]))),
+            lambda: list(db.teams.find(changed, projection(TEAM_FIELDS))),
+        )
+        return version, epoch, players, teams
 
-@st.cache_data(ttl=600)
-def get_players_by_status(status):
+    def snapshot(self):
+        # Reads run outside any lock, so concurrent reruns each cost a version
+        # check rather than queueing; published_version keeps them from
+        # recording a version whose documents are still being written. Only
+        # the merge is serialized, and a result no newer than the cache is
+        # dropped.
+        with self._lock:
+            seen_version, seen_epoch = self.version, self.epoch
+        version, epoch, players, teams = self.fetch(seen_version, seen_epoch)
+        with self._lock:
+            if players is not None and self._newer(seen_epoch, epoch, version):
+                if epoch != seen_epoch:
+                    self._players, self._teams = {}, {}
+                self._players.update((doc["player_id"], doc) for doc in players)
+                self._teams.update((doc["team_name"], doc) for doc in teams)
+                logger.info(f"Auction state cache refreshed from version {self.version} to {version}")
+                self.version, self.epoch = version, epoch
+                self._frames = (
+                    players_frame(
+                        self._players.values(), PLAYER_VIEWS["state"], team_names=list(self._teams), categories=self.league.categories
+                    ),
+                    teams_frame(self._teams.values()),
+                )
+            return (self.version,) + self._frames
+
+    def _newer(self, seen_epoch, epoch, version):
+        # A full read replaces the cache if it is of a later epoch or version.
+        # A delta holds everything written since the version it was read
+        # against, so it applies to any older snapshot of the same epoch.
+        if epoch != seen_epoch:
+            return self.epoch is None or (epoch, version) > (self.epoch, self.version)
+        return epoch == self.epoch and version > self.version
+
+    def reset(self):
+        # The next snapshot re-reads both collections in full
+        with self._lock:
+            self.epoch = None
+
+    def derived(self, version, name, build):
+        # Tables derived from a snapshot (rosters, sorted lists, CSV exports)
+        # are built once per version and shared by every session. A caller
+        # still holding an older version gets a fresh, uncached build.
+        if version != self.version:
+            return build()
+        views = self._views if self._views_version == version else {}
+        if name not in views:
+            views[name] = build()
+        self._views, self._views_version = views, version
+        return views[name]
+
+@st.cache_resource
+def get_state_cache(league=DEFAULT_LEAGUE):
+    # One per league, each shared by all of that league's sessions
+    return AuctionStateCache(league)
+
+@traced
+def get_auction_state(league=DEFAULT_LEAGUE):
+    return get_state_cache(league).snapshot()
+
+def get_derived_view(version, name, build, league=DEFAULT_LEAGUE):
+    return get_state_cache(league).derived(version, name, build)
+
+def _release_player(db, player, version, session):
+    # Credit the previous owner's ledger for a player whose sale is undone
+    if player and player.get("owner") is not None:
+        db.teams.update_one(
+            {"team_name": player["owner"]},
+            {"$inc": _ledger_change(-player.get("auction_price", 0), -1), "$set": {"_version": version}},
+            session=session,
+        )
+
+@traced
+def commit_sale(player_id, team_name, auction_price, league=DEFAULT_LEAGUE):
+    # Both writes are conditional, so concurrent consoles (or a stale screen)
+    # can neither sell a player twice nor push a team past its budget. The
+    # player is claimed first; if the team cannot pay, the claim is handed back.
     client = get_db_connection()
-    db = client['hpl_auction']
-    return pd.DataFrame(list(db.players.find({"auction_status": status})))
+    db = client[get_league(league).database]
+    player_id = int(player_id)
 
-def calculate_points(row):
-    points = 0
+    def record_sale(session):
+        claimed = db.players.find_one_and_update(
+            {"player_id": player_id, "owner": None},
+            {"$set": {"owner": team_name, "auction_price": auction_price, "_version": version}},
+            projection={"_id": 1},
+            session=session,
+        )
+        if claimed is None:
+            return SaleResult.ALREADY_SOLD
+        charged = db.teams.update_one(
+            {"team_name": team_name, "remaining": {"$gte": auction_price}},
+            {"$inc": _ledger_change(auction_price, 1), "$set": {"_version": version}},
+            session=session,
+        )
+        if charged.matched_count == 0:
+            db.players.update_one(
+                {"player_id": player_id, "owner": team_name},
+                {"$set": {"owner": None, "auction_price": 0, "_version": version}},
+                session=session,
+            )
+            return SaleResult.INSUFFICIENT_BUDGET
+        db.draw_queue.delete_one({"player_id": player_id}, session=session)
+        db.meta.update_one({"_id": "draw", "current": player_id}, {"$set": {"current": None}}, session=session)
+        record_event(db, version, "sale", [_player_change(
+            player_id,
+            {"owner": None, "auction_price": 0},
+            {"owner": team_name, "auction_price": auction_price},
+        )], session=session)
+        return SaleResult.SOLD
 
-    position_points = {"Opener": 100, "Middle Order": 75, "Finisher": 100}
-    skill_points = {"Batsman": 100, "Bowler": 100, "All Rounder": 150}
-    batting_skill_points = {"Beginner": 25, "Intermediate": 50, "Advanced": 75, "Expert": 100}
-    bowler_skill_points = {"Beginner": 25, "Intermediate": 50, "Advanced": 75, "Expert": 100}
-    bowler_type_points = {"Fast": 75, "Medium": 50, "Spin": 75}
-    keeper_points = {"Yes": 50, "No": 0}
+    with versioned_write(db) as version:
+        result = run_atomically(client, record_sale)
+    logger.info(f"Sale of player {player_id} to {team_name} for {auction_price}: {result.value}")
+    return result
 
-    points += position_points.get(row.get("Preferred Playing Position"), 0)
-    points += skill_points.get(row.get("Skill"), 0)
-    points += batting_skill_points.get(row.get("Batting Skill Level"), 0)
-    points += bowler_skill_points.get(row.get("Bowler Skill Level"), 0)
-    points += bowler_type_points.get(row.get("Bowler Type"), 0)
-    points += keeper_points.get(row.get("Wicket Keeper"), 0)
+@traced
+def update_auction_status(player_id, team_name, auction_price, league=DEFAULT_LEAGUE):
+    return commit_sale(player_id, team_name, auction_price, league)
 
-    # Round to nearest 100
-    return int(round(points / 100.0) * 100)
+@traced
+def authenticate(username, password, league=DEFAULT_LEAGUE):
+    client = get_db_connection()
+    db = client[get_league(league).database]
+    return find_user_role(db, username, password)
 
-def load_initial_data():
+@traced
+def check_collection_empty(collection_name, league=DEFAULT_LEAGUE):
     client = get_db_connection()
-    db = client['hpl_auction']
-    
-    if check_collection_empty("users"):
-        users_df = pd.read_csv("data/users.csv")
-        save_data("users", users_df)
-
-    if check_collection_empty("players"):
-        players_df = pd.read_csv("data/players.csv")
-        players_df["points"] = players_df.apply(calculate_points, axis=1)
-        players_df["owner"] = None
-        players_df["auction_price"] = 0
-        save_data("players", players_df)
-
-    if check_collection_empty("teams"):
-        teams_df = pd.read_csv("data/teams.csv")
-        save_data("teams", teams_df)
-
-    logger.info("Initial data loaded successfully.")
-    
-def reset_auction_data():
+    db = client[get_league(league).database]
+    # Collection metadata, not a scan
+    return db[collection_name].estimated_document_count() == 0
+
+@traced
+def mark_player_status(player_id, status, league=DEFAULT_LEAGUE):
+    return mark_players_status([player_id], status, league)
+
+@traced
+def mark_players_status(player_ids, status, league=DEFAULT_LEAGUE):
+    # Ids usually come out of a DataFrame as numpy integers, which BSON can't encode
+    player_ids = [int(player_id) for player_id in player_ids]
+    if not player_ids:
+        return BulkResult(0, 0)
     client = get_db_connection()
-    db = client['hpl_auction']
-    
-    # Reset player auction data
-    db.players.update_many(
-        {},
-        {
-            "$set": {"owner": None, "auction_price": 0, "auction_status": "regular"}
+    db = client[get_league(league).database]
+    with versioned_write(db) as version:
+        # Previous statuses go into the event so the mark can be reverted
+        previous = {
+            doc["player_id"]: doc.get("auction_status", "regular")
+            for doc in db.players.find({"player_id": {"$in": player_ids}}, {"player_id": 1, "auction_status": 1})
         }
-    )
-    
-    # Reset team budgets (if you're storing them in the database)
-    # If you're not storing team budgets in the database, you can omit this part
-    teams = db.teams.find()
-    for team in teams:
-        db.teams.update_one(
-            {"_id": team["_id"]},
-            {"$set": {"budget": 20000}}  # Or whatever the initial budget should be
+        updated = db.players.update_many(
+            {"player_id": {"$in": player_ids}},
+            {"$set": {"auction_status": status, "_version": version}},
         )
+        record_event(db, version, "status", [
+            _player_change(player_id, {"auction_status": before}, {"auction_status": status})
+            for player_id, before in previous.items() if before != status
+        ])
+        _sync_draw_queue(db, player_ids)
+    result = BulkResult(updated.matched_count, updated.modified_count)
+    logger.info(f"Marked players as {status}: {result.matched} matched, {result.modified} changed")
+    return result
+
+@traced
+def reset_auction_data(league=DEFAULT_LEAGUE):
+    client = get_db_connection()
+    db = client[get_league(league).database]
+    with versioned_write(db) as version:
+        # Reset player auction data
+        players = db.players.update_many({}, {"$set": dict(PLAYER_BASELINE, _version=version)})
+        
+        # Reset team ledgers
+        teams = db.teams.update_many({}, {"$set": dict(new_team_ledger(get_league(league).budget), _version=version)})
+        record_event(db, version, "reset", seed=build_draw_queue(db))
+    players = BulkResult(players.matched_count, players.modified_count)
+    teams = BulkResult(teams.matched_count, teams.modified_count)
     
-    logger.info("Auction data reset successfully.")
+    logger.info(f"Auction data reset successfully ({players.modified} players, {teams.modified} teams changed).")
+    return players, teams
     
     
-def undo_auction(player_name):
-    client = get_db_connection()
-    db = client['hpl_auction']
-    result = db.players.update_one(
-        {"Name": player_name},
-        {"$set": {"owner": None, "auction_price": 0, "auction_status": "regular"}}
-    )
-    if result.modified_count == 1:
-        logger.info(f"Auction undone for player: {player_name}")
+@traced
+def undo_auction(player_id, league=DEFAULT_LEAGUE):
+    client = get_db_connection()
+    db = client[get_league(league).database]
+
+    def record_undo(session):
+        # Only ownership is undone; a prime or end mark stays with the player
+        previous = db.players.find_one_and_update(
+            {"player_id": int(player_id), "owner": {"$ne": None}},
+            {"$set": {"owner": None, "auction_price": 0, "_version": version}},
+            projection={"owner": 1, "auction_price": 1},
+            session=session,
+        )
+        _release_player(db, previous, version, session)
+        if previous is not None:
+            _sync_draw_queue(db, [int(player_id)], session)
+            record_event(db, version, "undo", [_player_change(
+                int(player_id),
+                {"owner": previous["owner"], "auction_price": previous.get("auction_price", 0)},
+                {"owner": None, "auction_price": 0},
+            )], session=session)
+        return previous
+
+    with versioned_write(db) as version:
+        previous = run_atomically(client, record_undo)
+    if previous is not None:
+        logger.info(f"Auction undone for player: {player_id}")
         return True
     else:
-        logger.warning(f"Failed to undo auction for player: {player_name}")
-        return False
\ No newline at end of file
+        logger.warning(f"Failed to undo auction for player: {player_id}")
+        return False
+
+def _revert_event(client, db, event):
+    changes = [_player_change(change["player_id"], change["after"], change["before"]) for change in event["players"]]
+
+    def revert(session):
+        # Players are only reverted while still in the state the event left them in
+        applied = []
+        for change in changes:
+            result = db.players.update_one(
+                dict(change["before"], player_id=change["player_id"]),
+                {"$set": dict(change["after"], _version=version)},
+                session=session,
+            )
+            if result.matched_count:
+                applied.append(change)
+        for team_name, (spent, players) in _team_deltas(applied).items():
+            charged = db.teams.update_one(
+                {"team_name": team_name, "remaining": {"$gte": spent}},
+                {"$inc": _ledger_change(spent, players), "$set": {"_version": version}},
+                session=session,
+            )
+            if charged.matched_count == 0:
+                # Re-selling an undone player the team can no longer afford
+                for change in applied:
+                    db.players.update_one(
+                        {"player_id": change["player_id"]},
+                        {"$set": dict(change["before"], _version=version)},
+                        session=session,
+                    )
+                return False
+        _sync_draw_queue(db, [change["player_id"] for change in applied], session)
+        db.auction_events.update_one({"seq": event["seq"]}, {"$set": {"undone": True}}, session=session)
+        record_event(db, version, "revert", applied, session=session, reverts=event["seq"])
+        return True
+
+    with versioned_write(db) as version:
+        return run_atomically(client, revert)
+
+@traced
+def undo_last_events(count=1, league=DEFAULT_LEAGUE):
+    # Newest first; each revert is itself logged, and reverted events are
+    # flagged so they are never reverted twice.
+    client = get_db_connection()
+    db = client[get_league(league).database]
+    query = {"type": {"$in": REVERSIBLE_EVENTS}, "undone": {"$ne": True}}
+    last_reset = db.auction_events.find_one({"type": "reset"}, {"seq": 1}, sort=[("seq", DESCENDING)])
+    if last_reset:
+        query["seq"] = {"$gt": last_reset["seq"]}
+    reverted = []
+    for event in db.auction_events.find(query, sort=[("seq", DESCENDING)], limit=int(count)):
+        if not _revert_event(client, db, event):
+            logger.warning(f"Could not revert auction event {event['seq']} ({event['type']})")
+            break
+        reverted.append(event["seq"])
+    logger.info(f"Reverted auction events: {reverted}")
+    return reverted
+
+@traced
+def rebuild_from_events(league=DEFAULT_LEAGUE):
+    # One streaming pass over the log folds every event into the final state
+    # of the players it touched; everyone else is back at the baseline. Team
+    # ledgers are then recomputed from the rebuilt players.
+    client = get_db_connection()
+    db = client[get_league(league).database]
+    states = {}
+    events = db.auction_events.find({}, {"type": 1, "players": 1}, sort=[("seq", ASCENDING)], batch_size=1000)
+    for event in events:
+        if event["type"] == "reset":
+            states.clear()
+        for change in event["players"]:
+            states.setdefault(change["player_id"], dict(PLAYER_BASELINE)).update(change["after"])
+    with versioned_write(db, reload=True) as version:
+        operations = [UpdateMany({"player_id": {"$nin": list(states)}}, {"$set": dict(PLAYER_BASELINE, _version=version)})]
+        operations += [
+            UpdateOne({"player_id": player_id}, {"$set": dict(state, _version=version)})
+            for player_id, state in states.items()
+        ]
+        db.players.bulk_write(operations, ordered=False)
+        draw = db.meta.find_one({"_id": "draw"}, {"seed": 1}) or {}
+        build_draw_queue(db, draw.get("seed"))
+    rebuild_team_ledger(db)
+    logger.info(f"Rebuilt auction state from the event log ({len(states)} players changed from baseline)")
+    return len(states)
+
+def new_staging_collection(db, collection_name, indexed=True):
+    # Empty <collection>_staging, by default with the target's indexes
+    # already built, so a rename swaps data and indexes in together
+    staging = db[f"{collection_name}_staging"]
+    staging.drop()
+    db.create_collection(staging.name)
+    if indexed:
+        for keys, options in INDEXES.get(collection_name, []):
+            staging.create_index(keys, **options)
+    return staging
+
+def _baseline_changes(players):
+    # Event-log entries that take the baseline to these players' auction state
+    return [
+        _player_change(player["player_id"], {}, {field: player.get(field, value) for field, value in PLAYER_BASELINE.items()})
+        for player in players
+        if any(player.get(field, value) != value for field, value in PLAYER_BASELINE.items())
+    ]
+
+SNAPSHOT_COLLECTIONS = ["players", "teams", "draw_queue"]
+RESTORE_BATCH_SIZE = 5000
+
+# Attempts at a consistent export before giving up, EXPORT_RETRY_DELAY
+# seconds apart, e.g. while another process holds a version pending
+EXPORT_ATTEMPTS = 100
+EXPORT_RETRY_DELAY = 0.05
+
+@traced
+def export_state(league=DEFAULT_LEAGUE):
+    # Players, teams, draw queue and draw position as of one data version and
+    # one draw. Nothing is locked: the export waits out writes other processes
+    # have in flight and is retried if anything is written while it reads.
+    client = get_db_connection()
+    db = client[get_league(league).database]
+    for _ in range(EXPORT_ATTEMPTS):
+        state = db.meta.find_one({"_id": "state"}) or {}
+        version = state.get("version", 0)
+        if published_version(state)[0] == version:
+            players, teams, draw_queue, draw = run_concurrently(
+                lambda: list(db.players.find({}, {"_id": 0, "_version": 0})),
+                lambda: list(db.teams.find({}, projection(TEAM_FIELDS))),
+                lambda: list(db.draw_queue.find({}, {"_id": 0})),
+                lambda: db.meta.find_one({"_id": "draw"}) or {},
+            )
+            after = {doc["_id"]: doc for doc in db.meta.find({"_id": {"$in": ["state", "draw"]}}, {"version": 1, "seq": 1})}
+            if after.get("state", {}).get("version", 0) == version and after.get("draw", {}).get("seq") == draw.get("seq"):
+                return {
+                    "version": version,
+                    "players": players,
+                    "teams": teams,
+                    "draw_queue": draw_queue,
+                    "draw_seed": draw.get("seed"),
+                    "draw_current": draw.get("current"),
+                }
+        time.sleep(EXPORT_RETRY_DELAY)
+    raise RuntimeError(f"Could not export a consistent state of {db.name} in {EXPORT_ATTEMPTS} attempts")
+
+@traced
+def restore_state(state, league=DEFAULT_LEAGUE, **fields):
+    # Bulk-load every collection into staging, side by side, then swap each
+    # in with one rename. The restore is logged as a reset event carrying the
+    # restored sales and marks, so undo stops there and a replay of the log
+    # still ends at the restored state.
+    client = get_db_connection()
+    db = client[get_league(league).database]
+    def stage(name):
+        # Indexes are built once over the loaded documents rather than
+        # maintained through every insert
+        staging = new_staging_collection(db, name, indexed=False)
+        for first in range(0, len(state[name]), RESTORE_BATCH_SIZE):
+            staging.insert_many(state[name][first:first + RESTORE_BATCH_SIZE], ordered=False)
+        missing = _ensure_collection_indexes(staging, INDEXES[name])
+        if missing:
+            raise RuntimeError(f"Missing indexes on {staging.name}: {missing}")
+        return staging
+
+    staged = dict(zip(SNAPSHOT_COLLECTIONS, run_concurrently(*(lambda name=name: stage(name) for name in SNAPSHOT_COLLECTIONS))))
+    with versioned_write(db, reload=True) as version:
+        for name, staging in staged.items():
+            staging.rename(name, dropTarget=True)
+        db.meta.update_one(
+            {"_id": "draw"}, {"$set": {"seed": state["draw_seed"], "current": state["draw_current"]}}, upsert=True
+        )
+        record_event(db, version, "reset", _baseline_changes(state["players"]), seed=state["draw_seed"], **fields)
+    logger.info(f"Restored {len(state['players'])} players and {len(state['teams'])} teams as version {version}")
+    return version
+
+@traced
+def draw_next_player(league=DEFAULT_LEAGUE):
+    # The player on the block, if still unsold, is passed to the back of its
+    # tier; the head of the queue becomes the shared current draw. Draws leave
+    # players and teams alone, so they keep their own counter and log rather
+    # than bumping the data version; seed plus log reproduce the sequence.
+    client = get_db_connection()
+    db = client[get_league(league).database]
+    with write_lock(db.name):
+        passed = (db.meta.find_one({"_id": "draw"}, {"current": 1}) or {}).get("current")
+        entry = db.draw_queue.find_one({"player_id": passed}, {"tier": 1}) if passed is not None else None
+        if entry is not None:
+            last = db.draw_queue.find_one({"tier": entry["tier"]}, {"rank": 1}, sort=[("rank", DESCENDING)])
+            db.draw_queue.update_one({"player_id": passed}, {"$set": {"rank": last["rank"] + 1}})
+        head = db.draw_queue.find_one({}, {"player_id": 1}, sort=[("tier", ASCENDING), ("rank", ASCENDING)])
+        current = head["player_id"] if head else None
+        draw = db.meta.find_one_and_update(
+            {"_id": "draw"}, {"$set": {"current": current}, "$inc": {"seq": 1}},
+            projection={"seq": 1}, upsert=True, return_document=ReturnDocument.AFTER,
+        )
+        db.draw_events.insert_one({
+            "seq": draw["seq"], "type": "draw", "drawn": current,
+            "passed": passed if entry is not None else None, "ts": datetime.now(timezone.utc),
+        })
+    logger.info(f"Drew player {current} for auction")
+    return current
+
+@traced
+def get_current_draw(league=DEFAULT_LEAGUE):
+    client = get_db_connection()
+    db = client[get_league(league).database]
+    return (db.meta.find_one({"_id": "draw"}, {"current": 1}) or {}).get("current")
+
+def _plan_stages(plan):
+    yield plan.get("stage")
+    for child in [plan.get("inputStage")] + plan.get("inputStages", []):
+        if child:
+            yield from _plan_stages(child)
+
+@traced
+def explain_hot_queries(league=DEFAULT_LEAGUE):
+    # The filters used by the read and write paths above, paired with the
+    # stages of their winning plans. Every one should be an index scan.
+    client = get_db_connection()
+    db = client[get_league(league).database]
+    queries = {
+        "state version": ("meta", {"_id": "state"}),
+        "player by id": ("players", {"player_id": 1}),
+        "players by ids": ("players", {"player_id": {"$in": [1, 2, 3]}}),
+        "players by name and flat": ("players", {"Name": "", "Flat No": 0}),
+        "auctioned players": ("players", {"owner": {"$ne": None}}),
+        "unauctioned players": ("players", {"owner": None}),
+        "players by status": ("players", {"auction_status": "prime"}),
+        "changed players": ("players", {"_version": {"$gt": 0}}),
+        "players page": ("players", after_cursor((1000, 1)), PLAYER_ORDER),
+        "unauctioned players page": ("players", player_filter(sold=False), PLAYER_ORDER),
+        "team roster page": ("players", {"$and": [player_filter(owner=""), after_cursor((1000, 1))]}, PLAYER_ORDER),
+        "players by skill page": ("players", player_filter(skill="Batsman"), PLAYER_ORDER),
+        "players by status page": ("players", player_filter(status="prime"), PLAYER_ORDER),
+        "changed teams": ("teams", {"_version": {"$gt": 0}}),
+        "user by username": ("users", {"username": ""}),
+        "draw queue player": ("draw_queue", {"player_id": 1}),
+        "draw queue tier": ("draw_queue", {"tier": 0}),
+        "last reset event": ("auction_events", {"type": "reset"}),
+        "draws since": ("draw_events", {"seq": {"$gt": 0}}),
+        "reversible events": ("auction_events", {"seq": {"$gt": 0}, "type": {"$in": REVERSIBLE_EVENTS}}),
+    }
+    plans = {}
+    for label, (collection_name, query, *sort) in queries.items():
+        command = {"find": collection_name, "filter": query}
+        if sort:
+            command["sort"] = dict(sort[0])
+        explained = db.command("explain", command, verbosity="queryPlanner")
+        plans[label] = list(_plan_stages(explained["queryPlanner"]["winningPlan"]))
+    return plans
\ No newline at end of file